@@ -0,0 +1,181 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+from benchmarks.generate_sales_data import generate_sales_file
+from utils.file_handler import read_sales_data, iter_sales_data, save_clean_data, save_enriched_data
+from utils.data_processor import (
+    parse_transactions,
+    iter_transactions,
+    validate_and_filter,
+    iter_valid_transactions,
+    enrich_sales_data,
+    generate_sales_report
+)
+from utils.aggregator import SalesAccumulator
+from utils.vectorized import FrameStats
+from utils.parallel import parallel_validate_and_filter
+from utils.metrics import PipelineMetrics
+
+# ==========================================
+#          PIPELINE BENCHMARK
+# ==========================================
+# Times each stage of main.py on a synthetic file and records wall time,
+# throughput and peak memory as JSON, so runs can be compared across commits.
+# Run from the repo root: python -m benchmarks.bench_pipeline --rows 1000000
+
+def _synthetic_product_map(n=194):
+    # Same shape as create_product_mapping() over the DummyJSON catalog, no network
+    return {i: {'title': f'Product {i}', 'category': f'category-{i % 24}',
+                'brand': f'brand-{i % 40}', 'rating': round(2.5 + (i % 25) / 10, 2)}
+            for i in range(1, n + 1)}
+
+def run_pipeline(path, out_dir, backend='python', stream=False, workers=1, trace_memory=False, profile_stage=None):
+    metrics = PipelineMetrics(trace_memory=trace_memory, profile_stage=profile_stage,
+                            profile_output=os.path.join('benchmarks', 'results', f'profile_{profile_stage}.prof'),
+                            quiet=True)
+    report_path = os.path.join(out_dir, 'sales_report.txt')
+    clean_path = os.path.join(out_dir, 'cleaned_sales_data.csv')
+    enriched_path = os.path.join(out_dir, 'enriched_sales_data.txt')
+
+    if workers > 1:
+        with metrics.stage('read+parse+validate (parallel)') as s:
+            valid_data, _, summary = parallel_validate_and_filter(path, workers=workers)
+            s['rows_in'] = summary['total_input']
+            s['rows_out'] = len(valid_data)
+    elif stream:
+        with metrics.stage('read+parse+validate (stream)') as s:
+            summary = {}
+            valid_data = list(iter_valid_transactions(iter_transactions(iter_sales_data(path)), summary=summary))
+            s['rows_in'] = summary['total_input']
+            s['rows_out'] = len(valid_data)
+    else:
+        with metrics.stage('read') as s:
+            raw_lines = read_sales_data(path)
+            s['rows_out'] = len(raw_lines)
+            s['bytes_read'] = os.path.getsize(path)
+        with metrics.stage('parse', rows_in=len(raw_lines)) as s:
+            parsed_data = parse_transactions(raw_lines)
+            s['rows_out'] = len(parsed_data)
+        del raw_lines
+        with metrics.stage('validate', rows_in=len(parsed_data)) as s:
+            valid_data, _, _ = validate_and_filter(parsed_data)
+            s['rows_out'] = len(valid_data)
+        del parsed_data
+
+    product_map = _synthetic_product_map()
+    with metrics.stage('enrich', rows_in=len(valid_data)) as s:
+        enrichment = {}
+        enriched_data = enrich_sales_data(valid_data, product_map, summary=enrichment)
+        s['rows_out'] = len(enriched_data)
+
+    with metrics.stage('report', rows_in=len(valid_data)) as s:
+        stats = FrameStats(valid_data) if backend == 'pandas' else SalesAccumulator.from_transactions(valid_data)
+        stats.add_enrichment_summary(enrichment)
+        generate_sales_report(stats, output_file=report_path)
+
+    with metrics.stage('save_enriched', rows_in=len(enriched_data)) as s:
+        save_enriched_data(enriched_data, enriched_path)
+        s['bytes_written'] = os.path.getsize(enriched_path)
+
+    with metrics.stage('save_clean', rows_in=len(valid_data)) as s:
+        save_clean_data(valid_data, clean_path)
+        s['bytes_written'] = os.path.getsize(clean_path)
+
+    return metrics.stages
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _print_table(stages, previous=None):
+    prev = {s['stage']: s for s in previous['stages']} if previous else {}
+    # Peak RSS is the process high-water mark at the end of the stage; +MB is how far the stage raised it
+    print(f"{'Stage':<32} {'Seconds':>9} {'Rows/s':>12} {'Peak RSS MB':>12} {'+MB':>8} {'vs prev':>9}")
+    print("-" * 87)
+    for s in stages:
+        delta = ''
+        # Results from before the shared metrics module used 'seconds'
+        before = prev.get(s['stage'], {})
+        before = before.get('wall_seconds', before.get('seconds', 0))
+        if before > 0:
+            delta = f"{(s['wall_seconds'] / before - 1) * 100:+.1f}%"
+        rate = f"{s['rows_per_sec']:,}" if 'rows_per_sec' in s else '-'
+        # RSS is None where the resource module is missing (Windows)
+        peak = f"{s['peak_rss_mb']:.1f}" if s.get('peak_rss_mb') is not None else '-'
+        growth = f"{s['peak_rss_growth_mb']:.1f}" if s.get('peak_rss_growth_mb') is not None else '-'
+        print(f"{s['stage']:<32} {s['wall_seconds']:>9.3f} {rate:>12} {peak:>12} {growth:>8} {delta:>9}")
+    print("-" * 87)
+    print(f"{'TOTAL':<32} {sum(s['wall_seconds'] for s in stages):>9.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sales analytics pipeline stage by stage")
+    parser.add_argument('--rows', type=int, default=100_000, help="Rows to generate when --input is not given")
+    parser.add_argument('--input', help="Existing sales file to benchmark instead of generating one")
+    parser.add_argument('--dirty-rate', type=float, default=0.1)
+    parser.add_argument('--backend', choices=['python', 'pandas'], default='python')
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also record per-stage peak Python allocations (tracemalloc; much slower)")
+    parser.add_argument('--profile-stage', metavar='STAGE',
+                        help="cProfile one stage (e.g. parse) into benchmarks/results/profile_<STAGE>.prof")
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/results/<commit>_<rows>.json)")
+    parser.add_argument('--compare', metavar='JSON', help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.input
+        if path is None:
+            path = os.path.join(tmp, 'sales_data.txt')
+            t = time.perf_counter()
+            generate_sales_file(path, args.rows, args.dirty_rate)
+            print(f"Generated {args.rows:,} rows in {time.perf_counter() - t:.1f}s")
+
+        stages = run_pipeline(path, tmp, backend=args.backend, stream=args.stream,
+                              workers=args.workers, trace_memory=args.trace_memory,
+                              profile_stage=args.profile_stage)
+        input_bytes = os.path.getsize(path)
+
+    commit = _git_commit()
+    results = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'input': args.input,
+            'rows': args.rows if args.input is None else None,
+            'input_bytes': input_bytes,
+            'backend': args.backend,
+            'stream': args.stream,
+            'workers': args.workers
+        },
+        'stages': stages,
+        'total_seconds': round(sum(s['wall_seconds'] for s in stages), 6),
+        'peak_rss_mb': max((s['peak_rss_mb'] for s in stages if s['peak_rss_mb'] is not None), default=None)
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    _print_table(stages, previous)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"{commit or 'nogit'}_{args.rows}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+if __name__ == '__main__':
+    main()
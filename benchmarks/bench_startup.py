@@ -0,0 +1,136 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate_sales_data import generate_sales_file
+from benchmarks.bench_pipeline import _synthetic_product_map, _git_commit
+from utils.api_handler import PRODUCTS_URL
+
+# ==========================================
+#          STARTUP BENCHMARK
+# ==========================================
+# Times the short invocations a scheduler makes, each in a fresh interpreter:
+# a bare `import main` and a full non-interactive run over a small file, with
+# the product catalog answered from a warm on-disk cache (no network). The
+# slowest imports from `python -X importtime` are listed next to the timings.
+# Pass --repo to time another checkout, e.g. a git worktree of an older commit.
+# Run from the repo root: python -m benchmarks.bench_startup --rows 1000
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _seed_catalog_cache(work_dir):
+    # Same layout get_product_mapping() saves, fetched "just now"
+    path = os.path.join(work_dir, 'data', 'product_cache.json')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'url': PRODUCTS_URL, 'fetched_at': time.time(), 'validators': [],
+                   'mapping': _synthetic_product_map()}, f)
+
+def _time_command(command, work_dir, env, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        done = subprocess.run(command, cwd=work_dir, env=env, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, text=True)
+        times.append(time.perf_counter() - start)
+        if done.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed:\n{done.stderr}")
+    return {'min_seconds': round(min(times), 6), 'median_seconds': round(statistics.median(times), 6),
+            'runs': repeat}
+
+def slowest_imports(repo, work_dir, env, n=10):
+    """
+    [(module, cumulative microseconds)] for `import main` and the modules it
+    imports directly, slowest first.
+    """
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                          cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in done.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1 and cumulative.strip().isdigit():
+            imports.append((name.strip(), int(cumulative)))
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return imports[:n]
+
+def run_startup(repo, path, work_dir, repeat=10):
+    env = dict(os.environ, PYTHONPATH=repo)
+    _seed_catalog_cache(work_dir)
+    commands = {
+        'python -c pass': [sys.executable, '-c', 'pass'],
+        'import main': [sys.executable, '-c', 'import main'],
+        'main.py --no-prompt': [sys.executable, os.path.join(repo, 'main.py'), '--input', path, '--no-prompt']
+    }
+    scenarios = [{'scenario': name, **_time_command(command, work_dir, env, repeat)}
+                 for name, command in commands.items()]
+    return scenarios, slowest_imports(repo, work_dir, env)
+
+def _print_table(scenarios, imports, previous=None):
+    prev = {s['scenario']: s for s in previous['scenarios']} if previous else {}
+    print(f"{'Scenario':<24} {'Min s':>9} {'Median s':>9} {'vs prev':>9}")
+    print("-" * 54)
+    for s in scenarios:
+        delta = ''
+        before = prev.get(s['scenario'], {}).get('median_seconds', 0)
+        if before > 0:
+            delta = f"{(s['median_seconds'] / before - 1) * 100:+.1f}%"
+        print(f"{s['scenario']:<24} {s['min_seconds']:>9.3f} {s['median_seconds']:>9.3f} {delta:>9}")
+    print(f"\n{'Slowest imports (import main)':<40} {'ms':>9}")
+    print("-" * 54)
+    for name, micros in imports:
+        print(f"{name:<40} {micros / 1000:>9.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark interpreter startup and short runs of main.py")
+    parser.add_argument('--rows', type=int, default=1000, help="Rows in the generated input file")
+    parser.add_argument('--dirty-rate', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=10, help="Fresh interpreters per scenario")
+    parser.add_argument('--repo', default=REPO_ROOT, help="Checkout whose main.py is timed (default: this one)")
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/results/startup_<commit>_<rows>.json)")
+    parser.add_argument('--compare', metavar='JSON', help="Previous results file to compare against")
+    args = parser.parse_args(argv)
+    repo = os.path.abspath(args.repo)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sales_data.txt')
+        generate_sales_file(path, args.rows, args.dirty_rate)
+        scenarios, imports = run_startup(repo, path, tmp, repeat=args.repeat)
+
+    commit = _git_commit()
+    results = {
+        'meta': {
+            'commit': commit,
+            'repo': repo,
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rows': args.rows
+        },
+        'scenarios': scenarios,
+        'slowest_imports': imports
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    _print_table(scenarios, imports, previous)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"startup_{commit or 'nogit'}_{args.rows}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+
+# ==========================================
+#      SYNTHETIC SALES DATA GENERATOR
+# ==========================================
+# Writes pipe-delimited files in the exact format of data/sales_data.txt,
+# including the dirty rows parse_transactions / validate_and_filter must
+# handle. Rows are written in batches, so 100M-row files need little memory.
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+REGIONS = ['North', 'South', 'East', 'West']
+PRODUCTS = [
+    ('P101', 'Laptop', 45000), ('P102', 'Mouse', 650), ('P103', 'Keyboard', 1800),
+    ('P104', 'Monitor', 12000), ('P105', 'Webcam', 3500), ('P106', 'Headphones', 2800),
+    ('P107', 'USB Cable', 250), ('P108', 'External Hard Drive', 5200),
+    ('P109', 'Wireless Mouse', 900), ('P110', 'Laptop Charger', 1900),
+    ('P111', 'Keyboard,Mechanical', 4200), ('P112', 'Webcam HD', 5100)
+]
+
+# Dirty row kinds and their share of all dirty rows
+DIRTY_KINDS = [
+    ('comma_price', 0.30),      # 1,916  (valid after cleaning)
+    ('zero_quantity', 0.15),
+    ('negative_price', 0.10),
+    ('missing_region', 0.15),
+    ('bad_transaction_id', 0.08),
+    ('bad_product_id', 0.07),
+    ('bad_customer_id', 0.07),
+    ('wrong_field_count', 0.05),
+    ('non_numeric', 0.03)
+]
+
+def _row(i, rnd, n_customers, days):
+    p_id, p_name, base_price = rnd.choice(PRODUCTS)
+    price = max(1, int(base_price * rnd.uniform(0.8, 1.2)))
+    day = rnd.randrange(days)
+    return [
+        f"T{i:09d}", f"2024-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}", p_id, p_name,
+        str(rnd.randint(1, 10)), str(price), f"C{rnd.randrange(n_customers):06d}", rnd.choice(REGIONS)
+    ]
+
+def _make_dirty(fields, kind, rnd):
+    if kind == 'comma_price':
+        fields[5] = f"{int(fields[5]):,}"
+    elif kind == 'zero_quantity':
+        fields[4] = '0'
+    elif kind == 'negative_price':
+        fields[5] = f"-{fields[5]}"
+    elif kind == 'missing_region':
+        fields[7] = ''
+    elif kind == 'bad_transaction_id':
+        fields[0] = 'X' + fields[0][1:]
+    elif kind == 'bad_product_id':
+        fields[2] = fields[2][1:]
+    elif kind == 'bad_customer_id':
+        fields[6] = 'K' + fields[6][1:]
+    elif kind == 'wrong_field_count':
+        del fields[rnd.randrange(len(fields))]
+    elif kind == 'non_numeric':
+        fields[4] = 'abc'
+    return fields
+
+def generate_sales_file(path, rows, dirty_rate=0.1, n_customers=None, days=360, seed=42, batch_size=100_000):
+    """
+    Writes `rows` data lines (plus header) to `path` and returns the path.
+    """
+    rnd = random.Random(seed)
+    n_customers = n_customers or max(10, rows // 20)
+    kinds = [k for k, _ in DIRTY_KINDS]
+    weights = [w for _, w in DIRTY_KINDS]
+
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(HEADER + '\n')
+        batch = []
+        for i in range(rows):
+            fields = _row(i, rnd, n_customers, days)
+            if rnd.random() < dirty_rate:
+                fields = _make_dirty(fields, rnd.choices(kinds, weights)[0], rnd)
+            batch.append('|'.join(fields))
+            if len(batch) >= batch_size:
+                f.write('\n'.join(batch) + '\n')
+                batch = []
+        if batch:
+            f.write('\n'.join(batch) + '\n')
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales_data.txt-style file")
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of data rows (10K to 100M)")
+    parser.add_argument('--out', default='benchmarks/data/sales_100k.txt')
+    parser.add_argument('--dirty-rate', type=float, default=0.1, help="Fraction of rows made dirty")
+    parser.add_argument('--customers', type=int, default=None, help="Distinct customers (default rows/20)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    generate_sales_file(args.out, args.rows, args.dirty_rate, args.customers, seed=args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.out}")
+
+if __name__ == '__main__':
+    main()
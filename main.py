@@ -1,27 +1,75 @@
+import argparse
+import importlib.util
+import os
 import sys
-import pandas as pd  # <--- Added this import
-from utils.file_handler import read_sales_data, save_clean_data, save_enriched_data, save_report
+from utils.file_handler import (
+    read_sales_data,
+    iter_sales_data,
+    save_clean_data,
+    save_enriched_data,
+    save_clean_and_enriched_data,
+    save_report,
+    save_aggregate_state,
+    load_aggregate_state,
+    save_rollups,
+    COMPRESSION_SUFFIXES
+)
 from utils.data_processor import (
     parse_transactions,
-    validate_and_filter,
+    iter_transactions,
+    is_valid_transaction,
+    iter_validated_transactions,
+    iter_valid_transactions,
+    iter_filtered_transactions,
+    get_filter_options,
+    iter_collecting_filter_options,
     generate_sales_report,
-    enrich_sales_data
+    iter_enriched_transactions,
+    match_products
+)
+from utils.api_handler import get_product_mapping, wait_for_revalidation
+from utils.aggregator import SalesAccumulator, ApproxSalesAccumulator, merge_accumulators
+from utils.records import EnrichedTransaction
+from utils.parallel import parallel_filter_options, parallel_validate_and_filter
+from utils.incremental import update_incremental
+from utils.metrics import PipelineMetrics
+from utils.rollups import DateRollups
+from utils.scheduler import StageScheduler
+from utils.sqlite_store import SalesStore, SQLiteStats
+from utils.batch import (
+    parse_filter_spec,
+    normalize_filter,
+    load_batch_config,
+    resolve_inputs,
+    load_validated,
+    run_batch
 )
-from utils.api_handler import fetch_all_products, create_product_mapping
+# pandas / numpy (vectorized, index, columnar, service) and requests
+# (api_handler) are imported only by the modes and stages that use them, so
+# a plain run over a small file starts on the standard library alone.
+
+# Below this many valid rows a single filter pass is cheaper than importing
+# numpy / pandas and building a TransactionIndex
+INDEX_MIN_ROWS = 100_000
 
-def get_user_filters(parsed_data):
+def get_user_filters(options, preset=None):
     """
     Handles User Interaction for filtering.
+    `options` comes from get_filter_options() or SalesStore.filter_options().
+    A `preset` filter (from the command line or a config file) is used as-is
+    without prompting.
     """
-    # Calculate stats for display
-    regions = sorted(list(set(t['Region'] for t in parsed_data if t['Region'])))
-    amounts = [t['Quantity'] * t['UnitPrice'] for t in parsed_data]
-    min_amt = min(amounts) if amounts else 0
-    max_amt = max(amounts) if amounts else 0
+    regions = options['regions']
+    min_amt = options['min_amount']
+    max_amt = options['max_amount']
 
     print(f"\n   [3/10] Filter Options Available:")
     print(f"   Regions: {', '.join(regions)}")
     print(f"   Amount Range: ${min_amt:,.2f} - ${max_amt:,.2f}")
+
+    if preset is not None:
+        print(f"   ✓ Using filter '{preset['name']}' from the command line")
+        return preset['region'], preset['min_amount'], preset['max_amount']
     
     choice = input("\n   Do you want to filter data? (y/n): ").strip().lower()
     
@@ -52,42 +100,510 @@ def get_user_filters(parsed_data):
     
     return None, None, None
 
-def main():
+def _feed(rows, *sinks):
+    """
+    Passes rows through unchanged, adding each one to every sink (an
+    accumulator or DateRollups) on the way.
+    """
+    for t in rows:
+        for sink in sinks:
+            sink.add(t)
+        yield t
+
+def _count_products(record, mapping):
+    # StageScheduler `measure` hook for the catalog fetch
+    record['rows_out'] = len(mapping)
+
+def _file_size(path):
+    if os.path.isdir(path):
+        # Column stores are directories of column files
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path) if os.path.exists(path) else None
+
+def _columnar_path(path, output_format):
+    """
+    'output/cleaned_sales_data.csv' -> 'output/cleaned_sales_data.cols' (or .parquet / .feather).
+    """
+    suffix = {'columnar': '.cols', 'parquet': '.parquet', 'feather': '.feather'}[output_format]
+    return os.path.splitext(path)[0] + suffix
+
+def _report_output_options(args):
+    """
+    The given options that shape a single report and its data files; the
+    default, --stream and --workers paths apply them, --sqlite, batch mode
+    and --incremental do not.
+    """
+    given = []
+    if args.approximate:
+        given.append('--approximate')
+    if args.rollups:
+        given.append('--rollups')
+    if args.backend != 'python':
+        given.append(f'--backend {args.backend}')
+    if args.output_format != 'text':
+        given.append(f'--output-format {args.output_format}')
+    if args.compress:
+        given.append(f'--compress {args.compress}')
+    if args.save_state:
+        given.append('--save-state')
+    return given
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument('--input', nargs='+', metavar='PATH',
+                        help="Input file(s) or glob pattern(s) (default: data/sales_data.txt)")
+    parser.add_argument('--region', help="Only keep this region (skips the interactive prompt)")
+    parser.add_argument('--min-amount', type=float, help="Minimum transaction amount (skips the prompt)")
+    parser.add_argument('--max-amount', type=float, help="Maximum transaction amount (skips the prompt)")
+    parser.add_argument('--filter', action='append', default=[], metavar='SPEC',
+                        help="Filter spec, e.g. 'name=north,region=North,min=500,max=5000'. "
+                             "Repeat for several reports over a single parse")
+    parser.add_argument('--config', metavar='JSON',
+                        help="Batch config with 'inputs', 'filters', 'output_dir' and 'jobs'")
+    parser.add_argument('--output-dir', metavar='DIR',
+                        help="Batch output directory, one sub-directory per filter (default: output/batch)")
+    parser.add_argument('--jobs', type=int,
+                        help="Report jobs to run concurrently in batch mode (default: CPU count)")
+    parser.add_argument('--no-prompt', action='store_true',
+                        help="Never ask for filters; run unfiltered unless filters are given")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the input file in constant memory: rows are validated, enriched, "
+                             "aggregated and written as they are read")
+    parser.add_argument('--backend', choices=['python', 'pandas'], default='python',
+                        help="Analytics backend: pure-Python loops or vectorized pandas")
+    parser.add_argument('--approximate', action='store_true',
+                        help="Use fixed-size sketches for customer, product and unique-customer "
+                             "statistics (constant memory; the report states the error bounds)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Parse and validate the input in N processes (default: 1, serial)")
+    parser.add_argument('--refresh-catalog', action='store_true',
+                        help="Revalidate the cached product catalog with the API even if it is fresh")
+    parser.add_argument('--save-state', metavar='PATH',
+                        help="Also save the mergeable aggregate state as JSON")
+    parser.add_argument('--incremental', nargs='?', const='output/incremental_state.json', metavar='STATE',
+                        help="Only process lines appended since the last incremental run "
+                             "(state file default: output/incremental_state.json)")
+    parser.add_argument('--merge-states', nargs='+', metavar='PATH',
+                        help="Build the report by merging saved aggregate states instead of reading raw data")
+    parser.add_argument('--rollups', nargs='?', const='output/rollups.json', metavar='PATH',
+                        help="Also build day/week/month/quarter rollups with 7/30-day moving revenue, "
+                             "add them to the report and save them as JSON (default: output/rollups.json)")
+    parser.add_argument('--sqlite', nargs='?', const='output/sales.db', metavar='DB',
+                        help="Load the validated input(s) into a SQLite database that accumulates across "
+                             "runs and report on everything stored, with SQL aggregates (default: output/sales.db)")
+    parser.add_argument('--serve', nargs='?', const='127.0.0.1:8050', metavar='HOST:PORT',
+                        help="Load the input(s) once and serve the analytics as JSON over HTTP "
+                             "(default: 127.0.0.1:8050)")
+    parser.add_argument('--output-format', choices=['text', 'columnar', 'parquet', 'feather'], default='text',
+                        help="Format of the cleaned and enriched data files: text (CSV / pipe-delimited), "
+                             "a memory-mapped NumPy column store, or Parquet / Feather (needs pyarrow)")
+    parser.add_argument('--compress', choices=sorted(COMPRESSION_SUFFIXES),
+                        help="Compress the cleaned and enriched text files while writing them "
+                             "(.gz / .zst; zstd needs the zstandard package; text output only)")
+    parser.add_argument('--from-columnar', metavar='PATH',
+                        help="Build the report from a saved column store (or .parquet / .feather file) "
+                             "instead of parsing the raw data")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="Write per-stage timings, row counts, bytes and memory (.prom for Prometheus text, else JSON)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Also record per-stage peak Python allocations with tracemalloc (slower)")
+    parser.add_argument('--profile-stage', metavar='STAGE',
+                        help="Capture a cProfile of one stage (e.g. parse_transactions) to output/profile_<STAGE>.prof")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     # Define paths
     INPUT_PATH = 'data/sales_data.txt'
+    BATCH_OUTPUT_DIR = 'output/batch'
     OUTPUT_REPORT_PATH = 'output/sales_report.txt'
     OUTPUT_DATA_PATH = 'output/cleaned_sales_data.csv'
     OUTPUT_ENRICHED_PATH = 'data/enriched_sales_data.txt'
 
+    metrics = PipelineMetrics(trace_memory=args.trace_memory, profile_stage=args.profile_stage)
+    Accumulator = ApproxSalesAccumulator if args.approximate else SalesAccumulator
+    # Background stages: the catalog fetch and the output writers
+    scheduler = StageScheduler(metrics)
+
     print("="*40)
     print("      SALES ANALYTICS SYSTEM")
     print("="*40 + "\n")
 
+    if args.compress and args.output_format != 'text':
+        print(f"   X Error: --compress applies to text output only, not --output-format {args.output_format}.")
+        return
+    if args.stream and args.workers <= 1 and (args.backend == 'pandas' or args.output_format != 'text'):
+        print("   X Error: --stream writes text output with the Python backend; "
+              "--backend pandas and columnar formats need every row in memory.")
+        return
+    if args.compress == 'zstd' and importlib.util.find_spec('zstandard') is None:
+        print("   X Error: --compress zstd needs zstandard (pip install zstandard).")
+        return
+    if args.output_format in ('parquet', 'feather') and importlib.util.find_spec('pyarrow') is None:
+        print(f"   X Error: --output-format {args.output_format} needs pyarrow (pip install pyarrow).")
+        return
+
     try:
-        # --- STEP 1 & 2: READ DATA ---
-        print("   [1/10] Reading sales data...")
-        raw_lines = read_sales_data(INPUT_PATH)
-        if not raw_lines:
-            print("   X Error: No data found. Exiting.")
+        config = load_batch_config(args.config) if args.config else {}
+        inputs = resolve_inputs(args.input or config.get('inputs') or [INPUT_PATH])
+        filters = config.get('filters', []) + [parse_filter_spec(spec) for spec in args.filter]
+        if args.region is not None or args.min_amount is not None or args.max_amount is not None:
+            filters.append(normalize_filter({'region': args.region, 'min_amount': args.min_amount,
+                                             'max_amount': args.max_amount}))
+        preset = filters[0] if filters else (normalize_filter({}) if args.no_prompt else None)
+        INPUT_PATH = inputs[0]
+
+        # Same precedence as the modes below
+        batch_mode = bool(args.config or args.output_dir or len(inputs) > 1 or len(filters) > 1)
+        mode = None
+        if not args.serve:
+            if args.sqlite:
+                mode = '--sqlite'
+            elif batch_mode:
+                mode = 'Batch mode'
+            elif args.incremental and not (args.from_columnar or args.merge_states):
+                mode = '--incremental'
+        unsupported = _report_output_options(args) if mode else []
+        if unsupported:
+            print(f"   X Error: {mode} does not support {', '.join(unsupported)}.")
+            return
+
+        if args.serve:
+            # --- SERVICE MODE: keep the data and aggregates warm, answer over HTTP ---
+            from utils.service import AnalyticsService, serve
+            host, _, port = args.serve.rpartition(':')
+            print(f"   [1/2] Loading {len(inputs)} input file(s)...")
+            with metrics.stage('load_service', rows_in=None) as s:
+                service = AnalyticsService(inputs, workers=args.workers)
+                s['rows_out'] = len(service.snapshot.rows)
+            print(f"   ✓ Valid: {len(service.snapshot.rows)} | Invalid: {service.snapshot.summary['invalid']}")
+            print("\n   [2/2] Starting analytics service...")
+            serve(service, host or '127.0.0.1', int(port))
+            print("="*40)
+            return
+
+        if args.sqlite:
+            # --- SQLITE MODE: accumulate validated rows in a database, report with SQL ---
+            scheduler.submit('fetch_all_products', get_product_mapping, refresh=args.refresh_catalog,
+                             measure=_count_products)
+
+            print(f"   [1/3] Loading {len(inputs)} input file(s) into {args.sqlite}...")
+            with SalesStore(args.sqlite) as store:
+                for path in inputs:
+                    if not os.path.exists(path):
+                        print(f"   X Error: The file '{path}' was not found.")
+                        continue
+                    with metrics.stage('load_sqlite') as s:
+                        summary, parsed_options = {}, {}
+                        parsed = iter_collecting_filter_options(iter_transactions(iter_sales_data(path)), parsed_options)
+                        loaded = store.load(path, iter_validated_transactions(parsed, summary), parsed_options)
+                        s['rows_in'] = summary.get('total_input')
+                        s['rows_out'] = loaded
+                        s['bytes_read'] = _file_size(path) if loaded is not None else 0
+                    if loaded is None:
+                        print(f"   ✓ {path}: unchanged since the last load, skipped")
+                    else:
+                        print(f"   ✓ {path}: stored {loaded} | Invalid: {summary['invalid']}")
+
+                options = store.filter_options()
+                print(f"   ✓ Database holds {options['count']} transactions from {len(store.sources())} source(s)")
+                if not options['count']:
+                    print("   X Error: No data found. Exiting.")
+                    return
+                region_filter, min_filter, max_filter = get_user_filters(options, preset)
+
+                print("\n   [2/3] Computing statistics with SQL...")
+                product_map = scheduler.result('fetch_all_products')
+                with metrics.stage('aggregate', rows_in=options['count']) as s:
+                    stats = SQLiteStats(store, region_filter, min_filter, max_filter).enrich(product_map)
+                    s['rows_out'] = stats.transaction_count
+                if not stats.transaction_count:
+                    print("   X Error: No transactions left after filtering. Exiting.")
+                    return
+
+                print("\n   [3/3] Generating report...")
+                with metrics.stage('generate_sales_report', rows_in=stats.transaction_count) as s:
+                    generate_sales_report(stats, output_file=OUTPUT_REPORT_PATH)
+                    s['bytes_written'] = _file_size(OUTPUT_REPORT_PATH)
+            print(f"   ✓ Report saved to: {OUTPUT_REPORT_PATH}")
+            print("="*40)
             return
-        print(f"   ✓ Successfully read {len(raw_lines)} transactions")
-
-        # --- STEP 3: PARSE DATA ---
-        print("\n   [2/10] Parsing and cleaning data...")
-        parsed_data = parse_transactions(raw_lines)
-        print(f"   ✓ Parsed {len(parsed_data)} records")
-
-        # --- STEP 4 & 5: USER INTERACTION (FILTERS) ---
-        region_filter, min_filter, max_filter = get_user_filters(parsed_data)
-
-        # --- STEP 6 & 7: VALIDATE & FILTER ---
-        print("\n   [4/10] Validating transactions...")
-        valid_data, invalid_count, summary = validate_and_filter(
-            parsed_data, 
-            region=region_filter, 
-            min_amount=min_filter, 
-            max_amount=max_filter
-        )
+
+        if batch_mode:
+            # --- BATCH MODE: parse every input once, one report job per filter ---
+            output_dir = args.output_dir or config.get('output_dir') or BATCH_OUTPUT_DIR
+            jobs = args.jobs or config.get('jobs') or os.cpu_count()
+
+            # The catalog is fetched while the inputs are parsed
+            scheduler.submit('fetch_all_products', get_product_mapping, refresh=args.refresh_catalog,
+                             measure=_count_products)
+
+            print(f"   [1/3] Reading and validating {len(inputs)} input file(s)...")
+            with metrics.stage('load_validated') as s:
+                valid_data, summary = load_validated(inputs, workers=max(args.workers, jobs))
+                s['rows_in'] = summary['total_input']
+                s['rows_out'] = len(valid_data)
+                s['bytes_read'] = sum(_file_size(path) or 0 for path in inputs)
+            print(f"   ✓ Valid: {len(valid_data)} | Invalid: {summary['invalid']}")
+            if not valid_data:
+                print("   X Error: No valid data found. Exiting.")
+                return
+
+            print("\n   [2/3] Fetching product data from API...")
+            product_map = scheduler.result('fetch_all_products')
+            if not product_map:
+                print("   ! Warning: API fetch failed. Continuing without enrichment.")
+
+            print(f"\n   [3/3] Running {max(len(filters), 1)} report job(s) with {jobs} worker(s)...")
+            with metrics.stage('report_jobs', rows_in=len(valid_data)):
+                results = run_batch(valid_data, summary, filters, output_dir, product_map, jobs=jobs)
+            for r in results:
+                if r['report']:
+                    print(f"   ✓ {r['name']}: {r['summary']['final_count']} transactions -> {r['report']}")
+                else:
+                    print(f"   ! {r['name']}: no transactions left after filtering")
+            print(f"   ✓ Summary saved to: {os.path.join(output_dir, 'batch_summary.json')}")
+            print("="*40)
+            return
+
+        if args.from_columnar:
+            # --- COLUMNAR MODE: reload cleaned or enriched data without parsing ---
+            import pandas as pd
+            from utils.columnar import load_columnar
+            print(f"   [1/3] Loading {args.from_columnar}...")
+            with metrics.stage('load_columnar') as s:
+                table = load_columnar(args.from_columnar)
+                if isinstance(table, pd.DataFrame):
+                    enriched = 'API_Match' in table.columns
+                    def records():
+                        return table.to_dict('records')
+                else:
+                    enriched = table.enriched
+                    records = table.iter_records
+                s['rows_out'] = len(table) if isinstance(table, pd.DataFrame) else table.rows
+                s['bytes_read'] = _file_size(args.from_columnar)
+            print(f"   ✓ Loaded {s['rows_out']} {'enriched ' if enriched else ''}transactions")
+
+            print("\n   [2/3] Computing statistics...")
+            with metrics.stage('aggregate', rows_in=s['rows_out']):
+                if not enriched:
+                    product_map = get_product_mapping(refresh=args.refresh_catalog)
+                    rows = list(records())
+                    enrichment = {}
+                    match_products(rows, product_map, summary=enrichment)
+                    stats = Accumulator.from_transactions(rows).add_enrichment_summary(enrichment)
+                elif args.backend == 'pandas' and not args.approximate:
+                    from utils.vectorized import FrameStats
+                    stats = FrameStats(table if isinstance(table, pd.DataFrame) else table.to_frame())
+                else:
+                    stats = Accumulator.from_transactions(records())
+
+            print("\n   [3/3] Generating report...")
+            with metrics.stage('generate_sales_report', rows_in=stats.transaction_count) as s:
+                generate_sales_report(stats, output_file=OUTPUT_REPORT_PATH)
+                s['bytes_written'] = _file_size(OUTPUT_REPORT_PATH)
+            print(f"   ✓ Report saved to: {OUTPUT_REPORT_PATH}")
+            print("="*40)
+            return
+
+        if args.merge_states:
+            # --- MERGE MODE: combine partial aggregates, no raw data needed ---
+            print(f"   [1/2] Merging {len(args.merge_states)} aggregate states...")
+            with metrics.stage('merge_states') as s:
+                stats = merge_accumulators(load_aggregate_state(path) for path in args.merge_states)
+                s['rows_out'] = stats.transaction_count
+                s['bytes_read'] = sum(os.path.getsize(path) for path in args.merge_states)
+            print(f"   ✓ Merged {stats.transaction_count} transactions")
+
+            print("\n   [2/2] Generating report...")
+            with metrics.stage('generate_sales_report', rows_in=stats.transaction_count) as s:
+                generate_sales_report(stats, output_file=OUTPUT_REPORT_PATH)
+                s['bytes_written'] = _file_size(OUTPUT_REPORT_PATH)
+            if args.save_state:
+                save_aggregate_state(stats, args.save_state)
+            print(f"   ✓ Report saved to: {OUTPUT_REPORT_PATH}")
+            print("="*40)
+            return
+
+        if args.incremental:
+            # --- INCREMENTAL MODE: fold only the appended lines into saved aggregates ---
+            print("   [1/3] Fetching product data from API...")
+            with metrics.stage('fetch_all_products') as s:
+                product_map = get_product_mapping(refresh=args.refresh_catalog)
+                s['rows_out'] = len(product_map)
+            if not product_map:
+                print("   ! Warning: API fetch failed. Continuing without enrichment.")
+
+            print("\n   [2/3] Reading new transactions...")
+            with metrics.stage('update_incremental') as s:
+                stats, summary, new_bytes = update_incremental(INPUT_PATH, args.incremental, product_map)
+                s['bytes_read'] = new_bytes
+            if stats is None:
+                return
+            print(f"   ✓ Processed {new_bytes:,} new bytes | Valid: {summary['final_count']} | Invalid: {summary['invalid']}")
+
+            print("\n   [3/3] Generating report...")
+            with metrics.stage('generate_sales_report', rows_in=stats.transaction_count) as s:
+                generate_sales_report(stats, output_file=OUTPUT_REPORT_PATH)
+                s['bytes_written'] = _file_size(OUTPUT_REPORT_PATH)
+            print(f"   ✓ Report saved to: {OUTPUT_REPORT_PATH}")
+            print("="*40)
+            return
+
+        # The catalog fetch waits on the network, so it runs in the background
+        # while the input is read, parsed and validated; enrichment joins it
+        scheduler.submit('fetch_all_products', get_product_mapping, refresh=args.refresh_catalog,
+                         measure=_count_products)
+
+        if args.workers > 1:
+            # --- STEP 1-3: PARALLEL PARSE & COLLECT FILTER OPTIONS ---
+            print(f"   [1/10] Reading sales data with {args.workers} workers...")
+            print(f"   ✓ Reading from {INPUT_PATH}")
+
+            print("\n   [2/10] Parsing and cleaning data...")
+            with metrics.stage('filter_options') as s:
+                options = parallel_filter_options(INPUT_PATH, workers=args.workers)
+                s['rows_out'] = options['count']
+                s['bytes_read'] = _file_size(INPUT_PATH)
+            if not options['count']:
+                print("   X Error: No data found. Exiting.")
+                return
+            print(f"   ✓ Parsed {options['count']} records")
+
+            region_filter, min_filter, max_filter = get_user_filters(options, preset)
+
+            print("\n   [4/10] Validating transactions...")
+            with metrics.stage('validate_and_filter', rows_in=options['count']) as s:
+                valid_data, invalid_count, summary = parallel_validate_and_filter(
+                    INPUT_PATH,
+                    region=region_filter,
+                    min_amount=min_filter,
+                    max_amount=max_filter,
+                    workers=args.workers
+                )
+                s['rows_out'] = len(valid_data)
+                s['bytes_read'] = _file_size(INPUT_PATH)
+        elif args.stream:
+            # --- STREAM MODE: memory stays flat whatever the input size ---
+            # One pass collects the filter options; a second validates, enriches,
+            # aggregates and writes each row as it is read. No rows are kept.
+            print("   [1/4] Streaming sales data...")
+            print(f"   ✓ Reading from {INPUT_PATH}")
+            with metrics.stage('filter_options') as s:
+                options = get_filter_options(iter_transactions(iter_sales_data(INPUT_PATH)))
+                s['rows_out'] = options['count']
+                s['bytes_read'] = _file_size(INPUT_PATH)
+            if not options['count']:
+                print("   X Error: No data found. Exiting.")
+                return
+            print(f"   ✓ Parsed {options['count']} records")
+
+            region_filter, min_filter, max_filter = get_user_filters(options, preset)
+
+            print("\n   [2/4] Fetching product data from API...")
+            product_map = scheduler.result('fetch_all_products')
+            if product_map:
+                print(f"   ✓ Loaded {len(product_map)} products")
+            else:
+                print("   ! Warning: API fetch failed. Continuing without enrichment.")
+
+            if args.compress:
+                OUTPUT_DATA_PATH += COMPRESSION_SUFFIXES[args.compress]
+                OUTPUT_ENRICHED_PATH += COMPRESSION_SUFFIXES[args.compress]
+
+            print("\n   [3/4] Validating, enriching and saving data...")
+            stats = Accumulator()
+            rollups = DateRollups(approximate=args.approximate) if args.rollups else None
+            with metrics.stage('stream_transactions', rows_in=options['count']) as s:
+                summary = {}
+                valid = iter_valid_transactions(
+                    iter_transactions(iter_sales_data(INPUT_PATH)),
+                    region=region_filter,
+                    min_amount=min_filter,
+                    max_amount=max_filter,
+                    summary=summary
+                )
+                enriched = iter_enriched_transactions(valid, product_map)
+                sinks = (stats,) if rollups is None else (stats, rollups)
+                count = save_clean_and_enriched_data(_feed(enriched, *sinks), OUTPUT_DATA_PATH, OUTPUT_ENRICHED_PATH)
+                s['rows_out'] = count
+                s['bytes_read'] = _file_size(INPUT_PATH)
+                s['bytes_written'] = (_file_size(OUTPUT_DATA_PATH) or 0) + (_file_size(OUTPUT_ENRICHED_PATH) or 0)
+            print(f"   ✓ Valid: {count} | Invalid: {summary['invalid']}")
+            if summary['filtered_by_region'] > 0 or summary['filtered_by_amount'] > 0:
+                print(f"   ✓ Filtered out: {summary['filtered_by_region'] + summary['filtered_by_amount']} records")
+            if not count:
+                print("\n   X Error: No valid data left after processing. Exiting.")
+                return
+            print(f"   ✓ Enriched {stats.matched_count}/{count} transactions ({stats.matched_count / count * 100:.1f}%)")
+            print(f"   ✓ Saved to: {OUTPUT_ENRICHED_PATH}")
+
+            print("\n   [4/4] Generating report...")
+            with metrics.stage('generate_sales_report', rows_in=stats.transaction_count) as s:
+                generate_sales_report(stats, output_file=OUTPUT_REPORT_PATH, rollups=rollups)
+                s['bytes_written'] = _file_size(OUTPUT_REPORT_PATH)
+            if rollups is not None:
+                save_rollups(rollups, args.rollups)
+            if args.save_state:
+                save_aggregate_state(stats, args.save_state)
+            print(f"   ✓ Report saved to: {OUTPUT_REPORT_PATH}")
+            print("="*40)
+            return
+        else:
+            # --- STEP 1 & 2: READ DATA ---
+            print("   [1/10] Reading sales data...")
+            with metrics.stage('read_sales_data') as s:
+                raw_lines = read_sales_data(INPUT_PATH)
+                s['rows_out'] = len(raw_lines)
+                s['bytes_read'] = _file_size(INPUT_PATH)
+            if not raw_lines:
+                print("   X Error: No data found. Exiting.")
+                return
+            print(f"   ✓ Successfully read {len(raw_lines)} transactions")
+
+            # --- STEP 3: PARSE DATA ---
+            print("\n   [2/10] Parsing and cleaning data...")
+            with metrics.stage('parse_transactions', rows_in=len(raw_lines)) as s:
+                parsed_data = parse_transactions(raw_lines)
+                s['rows_out'] = len(parsed_data)
+            print(f"   ✓ Parsed {len(parsed_data)} records")
+
+            # Large inputs: index every parsed row once. The index metadata gives
+            # the filter options, and the chosen filter is a lookup over its valid rows
+            summary = {}
+            index = None
+            if len(parsed_data) >= INDEX_MIN_ROWS:
+                from utils.index import TransactionIndex
+                with metrics.stage('build_index', rows_in=len(parsed_data)) as s:
+                    index = TransactionIndex(parsed_data, valid=is_valid_transaction)
+                    s['rows_out'] = index.count
+                summary.update(total_input=len(parsed_data), invalid=len(parsed_data) - index.count)
+                options = index.filter_options()
+            else:
+                with metrics.stage('validate_transactions', rows_in=len(parsed_data)) as s:
+                    validated = list(iter_validated_transactions(parsed_data, summary))
+                    s['rows_out'] = len(validated)
+                options = get_filter_options(parsed_data)
+
+            # --- STEP 4 & 5: USER INTERACTION (FILTERS) ---
+            region_filter, min_filter, max_filter = get_user_filters(options, preset)
+
+            # --- STEP 6 & 7: VALIDATE & FILTER ---
+            print("\n   [4/10] Validating transactions...")
+            with metrics.stage('filter_transactions', rows_in=summary['total_input'] - summary['invalid']) as s:
+                if index is not None:
+                    valid_data = index.query(
+                        region=region_filter, 
+                        min_amount=min_filter, 
+                        max_amount=max_filter,
+                        summary=summary
+                    )
+                else:
+                    valid_data = list(iter_filtered_transactions(
+                        validated, region_filter, min_filter, max_filter, summary))
+                invalid_count = summary['invalid']
+                s['rows_out'] = len(valid_data)
         print(f"   ✓ Valid: {len(valid_data)} | Invalid: {invalid_count}")
         
         if summary['filtered_by_region'] > 0 or summary['filtered_by_amount'] > 0:
@@ -103,46 +619,103 @@ def main():
 
         # --- STEP 9: API FETCH ---
         print("\n   [6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_map = {}
-        if api_products:
-            product_map = create_product_mapping(api_products)
-            print(f"   ✓ Fetched {len(api_products)} products")
+        product_map = scheduler.result('fetch_all_products')
+        if product_map:
+            print(f"   ✓ Loaded {len(product_map)} products")
         else:
             print("   ! Warning: API fetch failed. Continuing without enrichment.")
 
         # --- STEP 10: ENRICHMENT ---
         print("\n   [7/10] Enriching sales data...")
-        enriched_data = enrich_sales_data(valid_data, product_map)
+        with metrics.stage('enrich_sales_data', rows_in=len(valid_data)) as s:
+            enrichment = {}
+            # Only each row's product entry is kept: the enriched records are
+            # built on the fly by the writer that streams them to disk
+            product_infos = match_products(valid_data, product_map, summary=enrichment)
+            s['rows_out'] = len(product_infos)
+        enriched_data = map(EnrichedTransaction.from_mapping, valid_data, product_infos)  # one-shot stream
         
-        enriched_count = sum(1 for t in enriched_data if t.get('API_Match'))
+        # Single pass over the rows feeds every report aggregate; the match
+        # stats come from the enrichment join instead of another scan
+        with metrics.stage('aggregate', rows_in=len(valid_data)):
+            if args.backend == 'pandas' and not args.approximate:
+                from utils.vectorized import FrameStats
+                stats = FrameStats(valid_data)
+            else:
+                stats = Accumulator.from_transactions(valid_data)
+            stats.add_enrichment_summary(enrichment)
+        rollups = None
+        if args.rollups:
+            with metrics.stage('build_rollups', rows_in=len(valid_data)) as s:
+                rollups = DateRollups(valid_data, approximate=args.approximate)
+                s['rows_out'] = len(rollups.days)
+        enriched_count = stats.matched_count
         if valid_data:
             percent = (enriched_count / len(valid_data)) * 100
             print(f"   ✓ Enriched {enriched_count}/{len(valid_data)} transactions ({percent:.1f}%)")
 
+        if args.output_format != 'text':
+            OUTPUT_DATA_PATH = _columnar_path(OUTPUT_DATA_PATH, args.output_format)
+            OUTPUT_ENRICHED_PATH = _columnar_path(OUTPUT_ENRICHED_PATH, args.output_format)
+        elif args.compress:
+            OUTPUT_DATA_PATH += COMPRESSION_SUFFIXES[args.compress]
+            OUTPUT_ENRICHED_PATH += COMPRESSION_SUFFIXES[args.compress]
+
         # --- STEP 11: SAVE ENRICHED DATA ---
+        # Both data files are written in the background while the report renders
         print("\n   [8/10] Saving enriched data...")
-        save_enriched_data(enriched_data, OUTPUT_ENRICHED_PATH)
-        print(f"   ✓ Saved to: {OUTPUT_ENRICHED_PATH}")
+        if args.output_format == 'text':
+            scheduler.submit('save_enriched_data', save_enriched_data, enriched_data, OUTPUT_ENRICHED_PATH,
+                             rows_in=len(valid_data),
+                             measure=lambda s, _: s.update(bytes_written=_file_size(OUTPUT_ENRICHED_PATH)))
+            scheduler.submit('save_clean_data', save_clean_data, valid_data, OUTPUT_DATA_PATH,
+                             rows_in=len(valid_data),
+                             measure=lambda s, _: s.update(bytes_written=_file_size(OUTPUT_DATA_PATH)))
+        else:
+            from utils.columnar import save_columnar
+            scheduler.submit('save_enriched_data', save_columnar, enriched_data, OUTPUT_ENRICHED_PATH,
+                             rows_in=len(valid_data),
+                             measure=lambda s, _: s.update(bytes_written=_file_size(OUTPUT_ENRICHED_PATH)))
+            scheduler.submit('save_clean_data', save_columnar, valid_data, OUTPUT_DATA_PATH,
+                             rows_in=len(valid_data),
+                             measure=lambda s, _: s.update(bytes_written=_file_size(OUTPUT_DATA_PATH)))
 
         # --- STEP 12: GENERATE REPORT ---
         print("\n   [9/10] Generating report...")
-        generate_sales_report(valid_data, enriched_data, OUTPUT_REPORT_PATH)
-        
-        # --- FIX: Convert list to DataFrame before saving CSV ---
-        df_clean = pd.DataFrame(valid_data)
-        save_clean_data(df_clean, OUTPUT_DATA_PATH)
-        
+        with metrics.stage('generate_sales_report', rows_in=stats.transaction_count) as s:
+            generate_sales_report(stats, output_file=OUTPUT_REPORT_PATH, rollups=rollups)
+            s['bytes_written'] = _file_size(OUTPUT_REPORT_PATH)
+        if rollups is not None:
+            save_rollups(rollups, args.rollups)
+
+        scheduler.join()
+        print(f"   ✓ Saved to: {OUTPUT_ENRICHED_PATH}")
         print(f"   ✓ Report saved to: {OUTPUT_REPORT_PATH}")
 
+        if args.save_state:
+            if args.backend == 'pandas' and not args.approximate:  # FrameStats keeps no state
+                stats = SalesAccumulator.from_transactions(valid_data).add_enrichment_summary(enrichment)
+            save_aggregate_state(stats, args.save_state)
+
         # --- FINAL SUCCESS ---
         print("\n   [10/10] Process Complete!")
         print("="*40)
 
     except Exception as e:
-        print(f"\n   X CRITICAL ERROR: {e}")
+        if metrics.current_stage:
+            print(f"\n   X CRITICAL ERROR in stage '{metrics.current_stage}': {e}")
+        else:
+            print(f"\n   X CRITICAL ERROR: {e}")
         # import traceback
         # traceback.print_exc()
 
+    finally:
+        scheduler.close()
+        # A stale catalog was served; give its background refresh a moment to land
+        wait_for_revalidation()
+        if args.metrics:
+            metrics.write(args.metrics)
+            print(f"   Metrics saved to: {args.metrics}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
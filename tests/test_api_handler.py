@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils import api_handler
+
+# ==========================================
+#     PRODUCT CATALOG OVER HTTP
+# ==========================================
+# A local http.server stands in for dummyjson: a paginated catalog with one
+# ETag per page. `catalog` controls what it serves and records every request.
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    catalog = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        catalog = self.catalog
+        query = parse_qs(urlparse(self.path).query)
+        skip = int(query.get('skip', ['0'])[0])
+        limit = int(query.get('limit', ['30'])[0])
+        catalog['requests'].append((skip, self.headers.get('If-None-Match')))
+        if catalog['fail']:
+            catalog['fail'] -= 1
+            self.send_response(catalog['fail_status'])
+            self.end_headers()
+            return
+
+        etag = f'"page{skip}-v{catalog["version"]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        products = [{'id': i + 1, 'title': f'Product {i + 1} v{catalog["version"]}', 'category': 'c',
+                     'brand': 'b', 'rating': 4.5} for i in range(skip, min(skip + limit, catalog['total']))]
+        body = json.dumps({'products': products, 'total': catalog['total'], 'skip': skip, 'limit': limit}).encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def catalog():
+    state = {'version': 1, 'total': 250, 'fail': 0, 'fail_status': 503, 'requests': []}
+    handler = type('Handler', (CatalogHandler,), {'catalog': state})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state['url'] = f'http://127.0.0.1:{server.server_address[1]}/products'
+    api_handler.clear_product_cache_memo()
+    yield state
+    api_handler.wait_for_revalidation()
+    server.shutdown()
+    server.server_close()
+    api_handler.clear_product_cache_memo()
+
+def _make_stale(cache_path):
+    with open(cache_path, encoding='utf-8') as f:
+        cache = json.load(f)
+    cache['fetched_at'] = time.time() - api_handler.CACHE_TTL - 60
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    api_handler.clear_product_cache_memo()
+
+def test_failed_revalidation_backs_off(catalog, tmp_path):
+    cache_path = str(tmp_path / 'product_cache.json')
+    mapping = api_handler.get_product_mapping(catalog['url'], cache_path=cache_path)
+    _make_stale(cache_path)
+
+    catalog['fail'], catalog['fail_status'] = 1_000, 404
+    catalog['requests'].clear()
+    assert api_handler.get_product_mapping(catalog['url'], cache_path=cache_path) == mapping
+    api_handler.wait_for_revalidation()
+    assert catalog['requests']
+    with open(cache_path, encoding='utf-8') as f:
+        assert 'revalidate_failed_at' in json.load(f)
+
+    # The next run serves the stale copy without asking again
+    api_handler.clear_product_cache_memo()
+    catalog['requests'].clear()
+    assert api_handler.get_product_mapping(catalog['url'], cache_path=cache_path) == mapping
+    api_handler.wait_for_revalidation()
+    assert catalog['requests'] == []
+
+def test_cut_off_revalidation_backs_off(catalog, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / 'product_cache.json')
+    api_handler.get_product_mapping(catalog['url'], cache_path=cache_path)
+    _make_stale(cache_path)
+
+    release = threading.Event()
+    real_revalidate = api_handler._revalidate
+    def slow_revalidate(*args, **kwargs):
+        release.wait(10)
+        return real_revalidate(*args, **kwargs)
+    monkeypatch.setattr(api_handler, '_revalidate', slow_revalidate)
+
+    api_handler.get_product_mapping(catalog['url'], cache_path=cache_path)
+    started = time.monotonic()
+    api_handler.wait_for_revalidation(timeout=0.2)
+    assert time.monotonic() - started < 2
+    with open(cache_path, encoding='utf-8') as f:
+        assert 'revalidate_failed_at' in json.load(f)
+    release.set()
+    api_handler.wait_for_revalidation()
+    # The refresh finished after all: its result replaces the failure mark
+    with open(cache_path, encoding='utf-8') as f:
+        assert 'revalidate_failed_at' not in json.load(f)
+
+def test_pages_are_fetched_and_cached(catalog, tmp_path):
+    cache_path = str(tmp_path / 'product_cache.json')
+    mapping = api_handler.get_product_mapping(catalog['url'], cache_path=cache_path)
+    assert sorted(mapping) == list(range(1, 251))
+    assert mapping[250] == {'title': 'Product 250 v1', 'category': 'c', 'brand': 'b', 'rating': 4.5}
+    assert sorted(skip for skip, _ in catalog['requests']) == [0, 100, 200]
+
+    # Fresh within the TTL: answered from disk, no request
+    api_handler.clear_product_cache_memo()
+    catalog['requests'].clear()
+    assert api_handler.get_product_mapping(catalog['url'], cache_path=cache_path) == mapping
+    assert catalog['requests'] == []
+
+def test_unchanged_catalog_costs_one_304_per_page(catalog, tmp_path):
+    cache_path = str(tmp_path / 'product_cache.json')
+    mapping = api_handler.get_product_mapping(catalog['url'], cache_path=cache_path)
+    _make_stale(cache_path)
+
+    catalog['requests'].clear()
+    assert api_handler.get_product_mapping(catalog['url'], cache_path=cache_path) == mapping
+    api_handler.wait_for_revalidation()
+    assert sorted(catalog['requests']) == [(0, '"page0-v1"'), (100, '"page100-v1"'), (200, '"page200-v1"')]
+    with open(cache_path, encoding='utf-8') as f:
+        assert time.time() - json.load(f)['fetched_at'] < 60
+
+def test_changed_catalog_is_downloaded_again(catalog, tmp_path):
+    cache_path = str(tmp_path / 'product_cache.json')
+    api_handler.get_product_mapping(catalog['url'], cache_path=cache_path)
+    catalog['version'], catalog['total'] = 2, 320
+
+    # refresh=True revalidates in the foreground
+    mapping = api_handler.get_product_mapping(catalog['url'], cache_path=cache_path, refresh=True)
+    assert len(mapping) == 320 and mapping[1]['title'] == 'Product 1 v2'
+    with open(cache_path, encoding='utf-8') as f:
+        assert [etag for etag, _ in json.load(f)['validators']] == [f'"page{s}-v2"' for s in (0, 100, 200, 300)]
+
+def test_transient_errors_are_retried(catalog, tmp_path):
+    catalog['fail'] = 2
+    mapping = api_handler.get_product_mapping(catalog['url'], cache_path=str(tmp_path / 'product_cache.json'))
+    assert len(mapping) == 250
+    assert [skip for skip, _ in catalog['requests'][:3]] == [0, 0, 0]
+
+def test_unreachable_without_cache(catalog, tmp_path):
+    catalog['fail'], catalog['fail_status'] = 1_000, 404
+    assert api_handler.get_product_mapping(catalog['url'], cache_path=str(tmp_path / 'product_cache.json')) == {}
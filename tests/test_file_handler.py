@@ -0,0 +1,44 @@
+from utils.file_handler import iter_sales_data, read_sales_data
+
+# ==========================================
+#     ENCODING FALLBACK
+# ==========================================
+# iter_sales_data streams, read_sales_data loads; for any file both must
+# return the same lines, decoded with one encoding for the whole file.
+
+HEADER = b'TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n'
+
+def _rows(n, name=b'Mouse'):
+    return b''.join(b'T%05d|2024-12-01|P101|%s|1|100|C001|North\n' % (i, name) for i in range(n))
+
+def _write(tmp_path, data):
+    path = tmp_path / 'sales_data.txt'
+    path.write_bytes(HEADER + data)
+    return str(path)
+
+def test_utf8_file(tmp_path):
+    path = _write(tmp_path, _rows(10, 'Café'.encode('utf-8')))
+    lines = list(iter_sales_data(path))
+    assert lines == read_sales_data(path)
+    assert lines[0].endswith('|Café|1|100|C001|North')
+
+def test_latin1_byte_past_the_sample(tmp_path):
+    # The sample is plain ASCII; the bad UTF-8 byte only shows up at the end
+    path = _write(tmp_path, _rows(3000) + b'T99999|2024-12-01|P101|Caf\xe9|1|100|C001|South\n')
+    lines = list(iter_sales_data(path))
+    assert lines == read_sales_data(path)
+    assert lines[-1] == 'T99999|2024-12-01|P101|Café|1|100|C001|South'
+
+def test_mixed_encodings_decode_one_way(tmp_path):
+    # Valid UTF-8 early, a Latin-1 byte late: the whole file is Latin-1, as
+    # read_sales_data reads it, not UTF-8 up to the failure
+    data = _rows(1, 'Café'.encode('utf-8')) + _rows(3000) + b'T99999|2024-12-01|P101|Caf\xe9|1|100|C001|South\n'
+    path = _write(tmp_path, data)
+    lines = list(iter_sales_data(path))
+    assert lines == read_sales_data(path)
+    assert lines[0] == 'T00000|2024-12-01|P101|CafÃ©|1|100|C001|North'
+
+def test_blank_lines_and_crlf(tmp_path):
+    path = _write(tmp_path, _rows(3).replace(b'\n', b'\r\n') + b'\n\n  \n')
+    assert list(iter_sales_data(path)) == read_sales_data(path) == [
+        f'T{i:05d}|2024-12-01|P101|Mouse|1|100|C001|North' for i in range(3)]
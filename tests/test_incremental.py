@@ -0,0 +1,45 @@
+from benchmarks.generate_sales_data import generate_sales_file
+from utils.incremental import update_incremental
+
+# ==========================================
+#     INCREMENTAL STATE
+# ==========================================
+# An incremental run must report what a full run over the same file reports,
+# whether the file grew or was replaced since the state was saved.
+
+def _full_count(path, tmp_path):
+    stats, _, _ = update_incremental(str(path), str(tmp_path / 'fresh_state.json'))
+    return stats.transaction_count
+
+def test_appended_lines_are_folded_in(tmp_path):
+    path = tmp_path / 'sales_data.txt'
+    state = str(tmp_path / 'state.json')
+    generate_sales_file(str(path), 100, dirty_rate=0, seed=1)
+    update_incremental(str(path), state)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('T99999|2024-12-01|P101|Laptop|1|500.0|C001|North\n')
+
+    stats, _, new_bytes = update_incremental(str(path), state)
+    assert stats.transaction_count == 101 == _full_count(path, tmp_path)
+    assert new_bytes < path.stat().st_size
+
+def test_replaced_file_is_rebuilt(tmp_path):
+    # Same name and header, more bytes than the saved offset: not an append
+    path = tmp_path / 'sales_data.txt'
+    state = str(tmp_path / 'state.json')
+    generate_sales_file(str(path), 100, dirty_rate=0, seed=1)
+    update_incremental(str(path), state)
+    generate_sales_file(str(path), 300, dirty_rate=0, seed=2)
+
+    stats, _, _ = update_incremental(str(path), state)
+    assert stats.transaction_count == 300 == _full_count(path, tmp_path)
+
+def test_unchanged_file_reads_nothing_new(tmp_path):
+    path = tmp_path / 'sales_data.txt'
+    state = str(tmp_path / 'state.json')
+    generate_sales_file(str(path), 100, dirty_rate=0, seed=1)
+    update_incremental(str(path), state)
+
+    stats, _, new_bytes = update_incremental(str(path), state)
+    assert stats.transaction_count == 100
+    assert new_bytes == 0
@@ -0,0 +1,76 @@
+import pytest
+
+from benchmarks.generate_sales_data import generate_sales_file
+from utils.data_processor import (
+    get_filter_options,
+    is_valid_transaction,
+    iter_collecting_filter_options,
+    iter_filtered_transactions,
+    iter_validated_transactions,
+    parse_transactions
+)
+from utils.file_handler import read_sales_data
+from utils.index import TransactionIndex
+from utils.sqlite_store import SalesStore
+
+# ==========================================
+#     INDEX AND FILTER OPTIONS
+# ==========================================
+# The index covers every parsed row: its metadata must give the same filter
+# options as get_filter_options() (invalid rows included), while queries
+# return only valid rows, exactly as iter_filtered_transactions does.
+
+@pytest.fixture(scope='module')
+def sales_file(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'sales_data.txt'
+    generate_sales_file(str(path), 5000, dirty_rate=0.3, n_customers=300, days=40, seed=11)
+    return str(path)
+
+@pytest.fixture(scope='module')
+def parsed(sales_file):
+    return parse_transactions(read_sales_data(sales_file))
+
+def test_options_match_a_full_scan(parsed):
+    index = TransactionIndex(parsed, valid=is_valid_transaction)
+    options = index.filter_options()
+    assert options == get_filter_options(parsed)
+    # Invalid rows widen the range, as they always have
+    assert options['min_amount'] < 0
+
+FILTERS = [
+    {},
+    {'region': 'North'},
+    {'region': 'Nowhere'},
+    {'min_amount': 1000},
+    {'max_amount': 500},
+    {'region': 'South', 'min_amount': 200, 'max_amount': 5000},
+]
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_queries_return_valid_rows_only(parsed, filters):
+    index = TransactionIndex(parsed, valid=is_valid_transaction)
+    expected_summary, summary = {}, {}
+    expected = list(iter_filtered_transactions(
+        iter_validated_transactions(parsed, expected_summary), summary=expected_summary, **filters))
+    summary.update(total_input=len(parsed), invalid=len(parsed) - index.count)
+    assert index.query(summary=summary, **filters) == expected
+    assert summary == expected_summary
+
+def test_date_customer_product_lookups_skip_invalid_rows(parsed):
+    index = TransactionIndex(parsed, valid=is_valid_transaction)
+    valid = [t for t in parsed if is_valid_transaction(t)]
+    t = valid[0]
+    assert index.query(customer_id=t['CustomerID']) == [r for r in valid if r['CustomerID'] == t['CustomerID']]
+    assert index.query(product_id=t['ProductID']) == [r for r in valid if r['ProductID'] == t['ProductID']]
+    assert index.query(start_date=t['Date'], end_date=t['Date']) == [r for r in valid if r['Date'] == t['Date']]
+
+def test_sqlite_options_cover_invalid_rows(tmp_path, sales_file, parsed):
+    options = {}
+    with SalesStore(str(tmp_path / 'sales.db')) as store:
+        store.load(sales_file, iter_validated_transactions(iter_collecting_filter_options(iter(parsed), options)),
+                   options)
+        stored = store.filter_options()
+    expected = get_filter_options(parsed)
+    assert stored['regions'] == expected['regions']
+    assert (stored['min_amount'], stored['max_amount']) == (expected['min_amount'], expected['max_amount'])
+    assert stored['count'] == sum(map(is_valid_transaction, parsed))
@@ -0,0 +1,37 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from utils.parallel import process_pool
+
+# ==========================================
+#     PROCESS POOL START METHOD
+# ==========================================
+# Forking while another thread runs can copy a held lock into the child, so
+# process_pool only forks when the main thread is alone.
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                                reason="fork is not the default start method here")
+
+def _start_method(pool):
+    return pool._mp_context.get_start_method()
+
+def test_forks_when_single_threaded():
+    if threading.active_count() > 1:
+        pytest.skip("another thread is running")
+    with process_pool(1) as pool:
+        assert _start_method(pool) == 'fork'
+        assert list(pool.map(abs, [-1, -2])) == [1, 2]
+
+def test_avoids_fork_with_live_threads():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        with process_pool(1) as pool:
+            assert _start_method(pool) in ('forkserver', 'spawn')
+            assert list(pool.map(abs, [-1, -2])) == [1, 2]
+    finally:
+        stop.set()
+        thread.join()
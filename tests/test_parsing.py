@@ -0,0 +1,82 @@
+import pytest
+
+from utils.data_processor import parse_transactions, validate_and_filter
+
+# ==========================================
+#     ROW REJECTION SEMANTICS
+# ==========================================
+# The batch parser must keep and reject exactly the rows the original
+# dict-based parser did. `_reference` is that parser, unchanged.
+
+def _reference(raw_lines):
+    cleaned_data = []
+    for line in raw_lines:
+        parts = line.strip().split('|')
+        if len(parts) != 8:
+            continue
+        t_id, date, p_id, p_name, qty_str, price_str, c_id, region = parts
+        clean_p_name = p_name.replace(',', ' ')
+        try:
+            qty = int(qty_str.replace(',', ''))
+            price = float(price_str.replace(',', ''))
+        except ValueError:
+            continue
+        cleaned_data.append({
+            'TransactionID': t_id, 'Date': date, 'ProductID': p_id,
+            'ProductName': clean_p_name, 'Quantity': qty, 'UnitPrice': price,
+            'CustomerID': c_id, 'Region': region
+        })
+    return cleaned_data
+
+EDGE_CASES = {
+    'plain': 'T001|2024-12-01|P101|Mouse|2|450|C001|North',
+    'comma in name': 'T002|2024-12-01|P101|Mouse,Wireless|2|450|C001|North',
+    'commas only in name': 'T003|2024-12-01|P101|,,|2|450|C001|North',
+    'thousands in quantity': 'T004|2024-12-01|P101|Mouse|1,000|450|C001|North',
+    'thousands in price': 'T005|2024-12-01|P101|Mouse|2|1,234.50|C001|North',
+    'stray commas in quantity': 'T006|2024-12-01|P101|Mouse|,2,|450|C001|North',
+    'stray commas in price': 'T007|2024-12-01|P101|Mouse|2|,450,|C001|North',
+    'comma-only quantity': 'T008|2024-12-01|P101|Mouse|,|450|C001|North',
+    'empty quantity': 'T009|2024-12-01|P101|Mouse||450|C001|North',
+    'empty price': 'T010|2024-12-01|P101|Mouse|2||C001|North',
+    'empty name and region': 'T011|2024-12-01|P101||2|450|C001|',
+    'empty ids': '||||2|450||North',
+    'negative quantity': 'T012|2024-12-01|P101|Mouse|-2|450|C001|North',
+    'negative price': 'T013|2024-12-01|P101|Mouse|2|-450|C001|North',
+    'zero quantity': 'T014|2024-12-01|P101|Mouse|0|450|C001|North',
+    'signed quantity': 'T015|2024-12-01|P101|Mouse|+2|450|C001|North',
+    'padded quantity': 'T016|2024-12-01|P101|Mouse| 2 |450|C001|North',
+    'non-numeric quantity': 'T017|2024-12-01|P101|Mouse|two|450|C001|North',
+    'decimal quantity': 'T018|2024-12-01|P101|Mouse|2.5|450|C001|North',
+    'non-numeric price': 'T019|2024-12-01|P101|Mouse|2|free|C001|North',
+    'exponent price': 'T020|2024-12-01|P101|Mouse|2|4.5e2|C001|North',
+    'underscore quantity': 'T021|2024-12-01|P101|Mouse|1_000|450|C001|North',
+    'too few fields': 'T022|2024-12-01|P101|Mouse|2|450|C001',
+    'too many fields': 'T023|2024-12-01|P101|Mouse|2|450|C001|North|x',
+    'pipe in name': 'T024|2024-12-01|P101|Mouse|Pad|2|450|C001|North',
+    'surrounding whitespace': '  T025|2024-12-01|P101|Mouse|2|450|C001|North \r\n',
+    'blank': '   ',
+}
+
+@pytest.mark.parametrize('line', EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_each_row_matches_reference(line):
+    assert [dict(t) for t in parse_transactions([line])] == _reference([line])
+
+def test_whole_batch_matches_reference():
+    lines = list(EDGE_CASES.values())
+    parsed = parse_transactions(lines)
+    assert [dict(t) for t in parsed] == _reference(lines)
+    # Types survive: int quantities, float prices
+    assert all(type(t['Quantity']) is int and type(t['UnitPrice']) is float for t in parsed)
+
+def test_rejections():
+    kept = {t['TransactionID'] for t in parse_transactions(EDGE_CASES.values())}
+    # Unparseable numbers and wrong field counts never reach validation
+    for dropped in ('T008', 'T009', 'T010', 'T017', 'T018', 'T019', 'T022', 'T023', 'T024'):
+        assert dropped not in kept
+    # Negative and zero values parse, then fail validation
+    valid, invalid, _ = validate_and_filter(parse_transactions(EDGE_CASES.values()))
+    valid_ids = {t['TransactionID'] for t in valid}
+    for rejected in ('T012', 'T013', 'T014', 'T011'):
+        assert rejected in kept and rejected not in valid_ids
+    assert {'T001', 'T004', 'T006', 'T007', 'T015', 'T016', 'T025'} <= valid_ids
@@ -0,0 +1,47 @@
+import os
+
+from benchmarks.generate_sales_data import generate_sales_file
+from utils.service import AnalyticsService
+
+# ==========================================
+#     SERVICE INGEST
+# ==========================================
+# Matches SalesStore.load: an unchanged file is never counted twice and a
+# changed one replaces its earlier rows.
+
+def _generate(path, rows, seed):
+    generate_sales_file(str(path), rows, dirty_rate=0.1, n_customers=50, days=10, seed=seed)
+    return str(path)
+
+def test_repeated_ingest_is_skipped(tmp_path):
+    base = _generate(tmp_path / 'base.txt', 300, seed=1)
+    extra = _generate(tmp_path / 'extra.txt', 200, seed=2)
+    service = AnalyticsService([base])
+    start = len(service.snapshot.rows)
+
+    first = service.ingest([extra])
+    assert first['added'] > 0 and first['skipped'] == []
+    total, revenue = first['total'], service.snapshot.stats.total_revenue
+
+    # Same file again, under another spelling too, and the initial input
+    relative = os.path.relpath(extra)
+    again = service.ingest([extra, relative, base])
+    assert again['added'] == 0 and again['skipped'] == [extra, relative, base]
+    assert again['generation'] == first['generation']
+    assert len(service.snapshot.rows) == total > start
+    assert service.snapshot.stats.total_revenue == revenue
+
+def test_changed_file_replaces_its_rows(tmp_path):
+    base = _generate(tmp_path / 'base.txt', 300, seed=1)
+    extra = _generate(tmp_path / 'extra.txt', 200, seed=2)
+    service = AnalyticsService([base])
+    service.ingest([extra])
+
+    _generate(extra, 50, seed=3)
+    os.utime(extra, ns=(1, 1))
+    result = service.ingest([extra])
+    assert result['replaced'] == [extra]
+
+    expected = AnalyticsService([base, extra])
+    assert len(service.snapshot.rows) == len(expected.snapshot.rows) == result['total']
+    assert service.snapshot.stats.total_revenue == expected.snapshot.stats.total_revenue
@@ -0,0 +1,36 @@
+from benchmarks.generate_sales_data import generate_sales_file
+from utils.data_processor import (
+    enrich_sales_data, iter_enriched_transactions, iter_transactions, iter_valid_transactions, validate_and_filter,
+    parse_transactions
+)
+from utils.file_handler import (
+    iter_sales_data, read_sales_data, save_clean_and_enriched_data, save_clean_data, save_enriched_data
+)
+
+# ==========================================
+#     ONE-PASS STREAMING OUTPUT
+# ==========================================
+# --stream writes both data files from a single pass over the rows; the
+# bytes must match the separate writers the default mode uses.
+
+PRODUCTS = {101: {'title': 'Laptop', 'category': 'laptops', 'brand': 'Apple', 'rating': 4.5},
+            105: {'title': 'Mouse', 'category': 'accessories', 'brand': None, 'rating': 3.9}}
+
+def test_one_pass_writers_match_separate_writers(tmp_path):
+    path = str(tmp_path / 'sales_data.txt')
+    generate_sales_file(path, 50_000, dirty_rate=0.1, seed=3)
+
+    valid, _, _ = validate_and_filter(parse_transactions(read_sales_data(path)))
+    save_clean_data(valid, str(tmp_path / 'clean.csv'))
+    save_enriched_data(enrich_sales_data(valid, PRODUCTS), str(tmp_path / 'enriched.txt'))
+
+    rows = iter_enriched_transactions(iter_valid_transactions(iter_transactions(iter_sales_data(path))), PRODUCTS)
+    count = save_clean_and_enriched_data(rows, str(tmp_path / 'clean_1.csv'), str(tmp_path / 'enriched_1.txt'))
+
+    assert count == len(valid)
+    assert (tmp_path / 'clean_1.csv').read_bytes() == (tmp_path / 'clean.csv').read_bytes()
+    assert (tmp_path / 'enriched_1.txt').read_bytes() == (tmp_path / 'enriched.txt').read_bytes()
+
+def test_no_rows_writes_nothing(tmp_path):
+    assert save_clean_and_enriched_data(iter([]), str(tmp_path / 'c.csv'), str(tmp_path / 'e.txt')) == 0
+    assert not list(tmp_path.iterdir())
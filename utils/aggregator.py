@@ -0,0 +1,418 @@
+from utils.sketches import HyperLogLog, SpaceSaving, TDigest, stable_hash
+
+# ==========================================
+#          SINGLE-PASS AGGREGATION
+# ==========================================
+
+STATE_VERSION = 1
+
+class SalesAccumulator:
+    """
+    Consumes each transaction exactly once and keeps every aggregate the
+    analytics functions and the report need, so a one-shot stream is enough.
+    """
+
+    def __init__(self):
+        self.total_revenue = 0
+        self.transaction_count = 0
+        self.min_date = None
+        self.max_date = None
+        self.regions = {}    # region -> [total_sales, transaction_count]
+        self.products = {}   # product name -> [qty, revenue]
+        self.customers = {}  # customer id -> [total_spent, purchase_count, set(product names)]
+        self.dates = {}      # date -> [revenue, transaction_count, set(customer ids)]
+        # Enrichment stats (only rows carrying an 'API_Match' key count)
+        self.enriched_count = 0
+        self.matched_count = 0
+        self.missing_products = {}  # insertion-ordered set of unmatched product names
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        acc = cls()
+        acc.update(transactions)
+        return acc
+
+    def update(self, transactions):
+        for t in transactions:
+            self.add(t)
+        return self
+
+    def add(self, t):
+        qty = t['Quantity']
+        sale = qty * t['UnitPrice']
+        date = t['Date']
+        p_name = t['ProductName']
+        c_id = t['CustomerID']
+
+        self.total_revenue += sale
+        self.transaction_count += 1
+        if self.min_date is None or date < self.min_date: self.min_date = date
+        if self.max_date is None or date > self.max_date: self.max_date = date
+
+        stats = self.regions.get(t['Region'])
+        if stats is None:
+            stats = self.regions[t['Region']] = [0.0, 0]
+        stats[0] += sale
+        stats[1] += 1
+
+        stats = self.products.get(p_name)
+        if stats is None:
+            stats = self.products[p_name] = [0, 0.0]
+        stats[0] += qty
+        stats[1] += sale
+
+        stats = self.customers.get(c_id)
+        if stats is None:
+            stats = self.customers[c_id] = [0.0, 0, set()]
+        stats[0] += sale
+        stats[1] += 1
+        stats[2].add(p_name)
+
+        stats = self.dates.get(date)
+        if stats is None:
+            stats = self.dates[date] = [0.0, 0, set()]
+        stats[0] += sale
+        stats[1] += 1
+        stats[2].add(c_id)
+
+        if 'API_Match' in t:
+            self._add_enrichment(t)
+
+    def add_enrichment(self, enriched_transactions):
+        """
+        Counts API match stats only, for enriched rows whose sales figures
+        were already accumulated from the plain transactions.
+        """
+        for t in enriched_transactions:
+            self._add_enrichment(t)
+        return self
+
+    def add_enrichment_summary(self, summary):
+        """
+        Adds the match stats enrich_sales_data() collected in its `summary`,
+        for accumulators fed the plain (unenriched) transactions.
+        """
+        self.enriched_count += summary['enriched']
+        self.matched_count += summary['matched']
+        self.missing_products.update(dict.fromkeys(summary['missing_products']))
+        return self
+
+    def _add_enrichment(self, t):
+        self.enriched_count += 1
+        match = t.get('API_Match')
+        if match == True:
+            self.matched_count += 1
+        elif match == False:
+            self.missing_products[t['ProductName']] = None
+
+    # --- Mergeable partial aggregates ---
+
+    def merge(self, other):
+        """
+        Folds another accumulator into this one (in place) and returns self.
+        Merging is associative; keys first seen in `other` are appended after
+        this accumulator's, as if its transactions had come afterwards.
+        """
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+        if other.min_date is not None and (self.min_date is None or other.min_date < self.min_date):
+            self.min_date = other.min_date
+        if other.max_date is not None and (self.max_date is None or other.max_date > self.max_date):
+            self.max_date = other.max_date
+
+        for table, other_table in ((self.regions, other.regions), (self.products, other.products)):
+            for key, (a, b) in other_table.items():
+                stats = table.get(key)
+                if stats is None:
+                    table[key] = [a, b]
+                else:
+                    stats[0] += a
+                    stats[1] += b
+
+        for table, other_table in ((self.customers, other.customers), (self.dates, other.dates)):
+            for key, (a, b, members) in other_table.items():
+                stats = table.get(key)
+                if stats is None:
+                    table[key] = [a, b, set(members)]
+                else:
+                    stats[0] += a
+                    stats[1] += b
+                    stats[2].update(members)
+
+        self.enriched_count += other.enriched_count
+        self.matched_count += other.matched_count
+        self.missing_products.update(other.missing_products)
+        return self
+
+    def to_state(self):
+        """
+        Returns a JSON-serializable snapshot that from_state() can restore.
+        """
+        return {
+            'version': STATE_VERSION,
+            'total_revenue': self.total_revenue,
+            'transaction_count': self.transaction_count,
+            'min_date': self.min_date,
+            'max_date': self.max_date,
+            'regions': {k: list(v) for k, v in self.regions.items()},
+            'products': {k: list(v) for k, v in self.products.items()},
+            'customers': {k: [v[0], v[1], sorted(v[2])] for k, v in self.customers.items()},
+            'dates': {k: [v[0], v[1], sorted(v[2])] for k, v in self.dates.items()},
+            'enriched_count': self.enriched_count,
+            'matched_count': self.matched_count,
+            'missing_products': list(self.missing_products)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        if state.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported aggregate state version: {state.get('version')}")
+        acc = cls()
+        acc.total_revenue = state['total_revenue']
+        acc.transaction_count = state['transaction_count']
+        acc.min_date = state['min_date']
+        acc.max_date = state['max_date']
+        acc.regions = {k: list(v) for k, v in state['regions'].items()}
+        acc.products = {k: list(v) for k, v in state['products'].items()}
+        acc.customers = {k: [v[0], v[1], set(v[2])] for k, v in state['customers'].items()}
+        acc.dates = {k: [v[0], v[1], set(v[2])] for k, v in state['dates'].items()}
+        acc.enriched_count = state['enriched_count']
+        acc.matched_count = state['matched_count']
+        acc.missing_products = dict.fromkeys(state['missing_products'])
+        return acc
+
+    # --- Views (same output as the functions in data_processor) ---
+
+    def region_wise_sales(self):
+        total_revenue = self.total_revenue
+        stats = {}
+        for r, (sales, count) in self.regions.items():
+            stats[r] = {
+                'total_sales': sales, 'transaction_count': count,
+                'percentage': round((sales / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
+            }
+        return dict(sorted(stats.items(), key=lambda item: item[1]['total_sales'], reverse=True))
+
+    def top_selling_products(self, n=5):
+        result_list = [(k, qty, rev) for k, (qty, rev) in self.products.items()]
+        return sorted(result_list, key=lambda x: x[1], reverse=True)[:n]
+
+    def customer_analysis(self):
+        customer_stats = {}
+        for c_id, (spent, count, products) in self.customers.items():
+            customer_stats[c_id] = {
+                'total_spent': spent, 'purchase_count': count, 'products_bought': list(products),
+                'avg_order_value': round(spent / count, 2) if count > 0 else 0.0
+            }
+        return dict(sorted(customer_stats.items(), key=lambda item: item[1]['total_spent'], reverse=True))
+
+    def daily_sales_trend(self):
+        final_stats = {}
+        for date in sorted(self.dates.keys()):
+            revenue, count, customers = self.dates[date]
+            final_stats[date] = {
+                'revenue': revenue, 'transaction_count': count, 'unique_customers': len(customers)
+            }
+        return final_stats
+
+    def find_peak_sales_day(self):
+        if not self.dates: return None
+        peak_date = max(sorted(self.dates.keys()), key=lambda d: self.dates[d][0])
+        return (peak_date, self.dates[peak_date][0], self.dates[peak_date][1])
+
+    def low_performing_products(self, threshold=10):
+        result_list = [(k, qty, rev) for k, (qty, rev) in self.products.items() if qty < threshold]
+        return sorted(result_list, key=lambda x: x[1])
+
+# ==========================================
+#          APPROXIMATE AGGREGATION
+# ==========================================
+# Same interface as SalesAccumulator, but the per-customer and per-product
+# tables and the per-date customer sets are replaced by fixed-size sketches
+# (see utils/sketches.py for the error bounds), so memory no longer grows
+# with the number of distinct customers or products. Totals, regions and
+# per-date revenue and transaction counts stay exact.
+
+class ApproxSalesAccumulator(SalesAccumulator):
+    approximate = True
+
+    def __init__(self, capacity=1000, precision=12, daily_precision=10, compression=100):
+        super().__init__()
+        self.products = SpaceSaving(capacity)    # weight: quantity, extra: revenue
+        self.customers = SpaceSaving(capacity)   # weight: amount spent
+        self.distinct_customers = HyperLogLog(precision)
+        self.daily_precision = daily_precision
+        self.order_values = TDigest(compression)
+        # self.dates: date -> [revenue, transaction_count, HyperLogLog of customer ids]
+
+    def add(self, t):
+        qty = t['Quantity']
+        sale = qty * t['UnitPrice']
+        date = t['Date']
+        c_hash = stable_hash(t['CustomerID'])
+
+        self.total_revenue += sale
+        self.transaction_count += 1
+        if self.min_date is None or date < self.min_date: self.min_date = date
+        if self.max_date is None or date > self.max_date: self.max_date = date
+
+        stats = self.regions.get(t['Region'])
+        if stats is None:
+            stats = self.regions[t['Region']] = [0.0, 0]
+        stats[0] += sale
+        stats[1] += 1
+
+        self.products.add(t['ProductName'], qty, sale)
+        self.customers.add(t['CustomerID'], sale)
+        self.distinct_customers.add_hash(c_hash)
+        self.order_values.add(sale)
+
+        stats = self.dates.get(date)
+        if stats is None:
+            stats = self.dates[date] = [0.0, 0, HyperLogLog(self.daily_precision)]
+        stats[0] += sale
+        stats[1] += 1
+        stats[2].add_hash(c_hash)
+
+        if 'API_Match' in t:
+            self._add_enrichment(t)
+
+    def merge(self, other):
+        self.total_revenue += other.total_revenue
+        self.transaction_count += other.transaction_count
+        if other.min_date is not None and (self.min_date is None or other.min_date < self.min_date):
+            self.min_date = other.min_date
+        if other.max_date is not None and (self.max_date is None or other.max_date > self.max_date):
+            self.max_date = other.max_date
+
+        for key, (a, b) in other.regions.items():
+            stats = self.regions.get(key)
+            if stats is None:
+                self.regions[key] = [a, b]
+            else:
+                stats[0] += a
+                stats[1] += b
+        self.products.merge(other.products)
+        self.customers.merge(other.customers)
+        self.distinct_customers.merge(other.distinct_customers)
+        self.order_values.merge(other.order_values)
+        for key, (a, b, sketch) in other.dates.items():
+            stats = self.dates.get(key)
+            if stats is None:
+                self.dates[key] = [a, b, HyperLogLog.from_state(sketch.to_state())]
+            else:
+                stats[0] += a
+                stats[1] += b
+                stats[2].merge(sketch)
+
+        self.enriched_count += other.enriched_count
+        self.matched_count += other.matched_count
+        self.missing_products.update(other.missing_products)
+        return self
+
+    def to_state(self):
+        return {
+            'version': STATE_VERSION,
+            'approximate': True,
+            'total_revenue': self.total_revenue,
+            'transaction_count': self.transaction_count,
+            'min_date': self.min_date,
+            'max_date': self.max_date,
+            'regions': {k: list(v) for k, v in self.regions.items()},
+            'products': self.products.to_state(),
+            'customers': self.customers.to_state(),
+            'distinct_customers': self.distinct_customers.to_state(),
+            'daily_precision': self.daily_precision,
+            'order_values': self.order_values.to_state(),
+            'dates': {k: [v[0], v[1], v[2].to_state()] for k, v in self.dates.items()},
+            'enriched_count': self.enriched_count,
+            'matched_count': self.matched_count,
+            'missing_products': list(self.missing_products)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        if state.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported aggregate state version: {state.get('version')}")
+        acc = cls(daily_precision=state['daily_precision'])
+        acc.total_revenue = state['total_revenue']
+        acc.transaction_count = state['transaction_count']
+        acc.min_date = state['min_date']
+        acc.max_date = state['max_date']
+        acc.regions = {k: list(v) for k, v in state['regions'].items()}
+        acc.products = SpaceSaving.from_state(state['products'])
+        acc.customers = SpaceSaving.from_state(state['customers'])
+        acc.distinct_customers = HyperLogLog.from_state(state['distinct_customers'])
+        acc.order_values = TDigest.from_state(state['order_values'])
+        acc.dates = {k: [v[0], v[1], HyperLogLog.from_state(v[2])] for k, v in state['dates'].items()}
+        acc.enriched_count = state['enriched_count']
+        acc.matched_count = state['matched_count']
+        acc.missing_products = dict.fromkeys(state['missing_products'])
+        return acc
+
+    # --- Views ---
+
+    def top_selling_products(self, n=5):
+        return [(k, qty, rev) for k, qty, _, _, rev in self.products.top(n)]
+
+    def customer_analysis(self):
+        """
+        Tracked customers only, heaviest first; `total_spent` may be
+        overestimated by up to `error`. No per-customer product lists are kept.
+        """
+        customer_stats = {}
+        for c_id, spent, error, count, _ in self.customers.top():
+            customer_stats[c_id] = {
+                'total_spent': spent, 'purchase_count': count, 'error': error,
+                'avg_order_value': round(spent / count, 2) if count > 0 else 0.0
+            }
+        return customer_stats
+
+    def daily_sales_trend(self):
+        final_stats = {}
+        for date in sorted(self.dates.keys()):
+            revenue, count, customers = self.dates[date]
+            final_stats[date] = {
+                'revenue': revenue, 'transaction_count': count,
+                'unique_customers': round(customers.count())
+            }
+        return final_stats
+
+    def low_performing_products(self, threshold=10):
+        result_list = [(k, qty, rev) for k, qty, _, _, rev in self.products.top() if qty < threshold]
+        return sorted(result_list, key=lambda x: x[1])
+
+    def approximation_summary(self):
+        """
+        Sketch-based figures and their error bounds, for the report.
+        """
+        return {
+            'distinct_customers': round(self.distinct_customers.count()),
+            'distinct_customers_error': 1.04 / len(self.distinct_customers.registers) ** 0.5,
+            'daily_customers_error': 1.04 / (1 << self.daily_precision) ** 0.5,
+            'order_value_quantiles': {q: self.order_values.quantile(q) for q in (0.5, 0.9, 0.99)},
+            'customer_error': self.customers.total / self.customers.capacity,
+            'product_error': self.products.total / self.products.capacity,
+            'exact_customers': len(self.customers.items) < self.customers.capacity,
+            'exact_products': len(self.products.items) < self.products.capacity
+        }
+
+def accumulator_from_state(state):
+    if state.get('approximate'):
+        return ApproxSalesAccumulator.from_state(state)
+    return SalesAccumulator.from_state(state)
+
+def merge_accumulators(accumulators):
+    """
+    Merges partial aggregates (e.g. one per daily file) into a new accumulator
+    of the same kind as the first one.
+    """
+    merged = None
+    for acc in accumulators:
+        if merged is None:
+            merged = accumulator_from_state(acc.to_state())
+        elif getattr(acc, 'approximate', False) != getattr(merged, 'approximate', False):
+            raise ValueError("Cannot merge exact and approximate aggregate states")
+        else:
+            merged.merge(acc)
+    return merged if merged is not None else SalesAccumulator()
@@ -1,25 +1,23 @@
-import requests
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.file_handler import open_atomic
 
-def fetch_all_products():
-    """
-    Fetches all products from DummyJSON API.
-    """
-    url = "https://dummyjson.com/products?limit=100"
-    
-    try:
-        print(f"Connecting to {url}...")
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        products = data.get('products', [])
-        
-        print(f"Success! Fetched {len(products)} products.")
-        return products
-        
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data: {e}")
-        return []
+# requests is imported inside the functions that talk to the network: a run
+# served from the product cache never pays for importing it.
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+PAGE_SIZE = 100
+MAX_WORKERS = 8        # concurrent requests (and pooled connections)
+RETRIES = 3
+BACKOFF = 0.25         # seconds, doubled after every failed attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHE_PATH = 'data/product_cache.json'
+CACHE_TTL = 24 * 60 * 60        # serve from cache without asking for a day
+CACHE_MAX_STALE = 7 * 24 * 60 * 60  # after that, serve stale while revalidating for a week
+REVALIDATE_EXIT_WAIT = 5           # seconds a finishing run waits for a background revalidation
+REVALIDATE_BACKOFF = 60 * 60       # after a failed or cut-off revalidation, serve stale without asking
 
 def create_product_mapping(api_products):
     """
@@ -41,4 +39,237 @@ def create_product_mapping(api_products):
                 'rating': p.get('rating')
             }
             
-    return mapping
\ No newline at end of file
+    return mapping
+
+# ==========================================
+#          PAGINATED CONCURRENT FETCH
+# ==========================================
+
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session(pool_size=MAX_WORKERS):
+    """
+    Shared requests.Session so every request reuses pooled keep-alive connections.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    global _session
+    with _session_lock:
+        if _session is None or _session.pool_size < pool_size:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.pool_size = pool_size
+            _session = session
+        return _session
+
+def _request(session, url, params=None, headers=None, timeout=10, retries=RETRIES, backoff=BACKOFF):
+    """
+    GET with a per-request timeout, retrying connection errors, timeouts and
+    429/5xx responses with exponential backoff.
+    """
+    import requests
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+def _get_page(args):
+    session, url, skip, timeout, headers = args
+    response = _request(session, url, params={'limit': PAGE_SIZE, 'skip': skip}, headers=headers, timeout=timeout)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+def _get_pages(session, url, skips, timeout, max_workers, headers=None):
+    """
+    Responses for the pages starting at `skips`, fetched concurrently, in order.
+    """
+    headers = headers or [None] * len(skips)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_get_page, [(session, url, skip, timeout, h) for skip, h in zip(skips, headers)]))
+
+def _remaining_skips(first_page):
+    return range(len(first_page.get('products', [])), first_page.get('total', 0), PAGE_SIZE)
+
+# ==========================================
+#          CACHED PRODUCT CATALOG
+# ==========================================
+# Lookup order: in-process memo -> on-disk cache (fresh within CACHE_TTL)
+# -> stale copy served while a background revalidation runs -> network.
+# Revalidation sends every page's If-None-Match / If-Modified-Since, so an
+# unchanged catalog costs one 304 response per page. Any cached copy is used when the
+# endpoint is slow or down. A revalidation that fails, or is still running
+# when the run exits, is recorded in the cache; the stale copy is then served
+# without asking for REVALIDATE_BACKOFF, so a dead endpoint doesn't add the
+# exit wait to every run.
+
+_memo = {}
+_revalidating = set()
+_revalidate_threads = {}  # thread -> cache path
+_lock = threading.Lock()
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        # JSON object keys are strings; product IDs are ints everywhere else
+        cache['mapping'] = {int(k): v for k, v in cache['mapping'].items()}
+        return cache
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _save_cache(cache, cache_path):
+    with open_atomic(cache_path) as f:
+        json.dump(cache, f)
+
+def _conditional_headers(etag, last_modified):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+def _revalidate(url, cache, timeout, max_workers=MAX_WORKERS):
+    """
+    Conditional GET of every cached catalog page, then the whole catalog
+    again if any of them changed. Returns a new cache dict, or None on failure.
+    """
+    import requests
+
+    validators = cache.get('validators') if cache and cache.get('url') == url else None
+    try:
+        session = _get_session(max_workers)
+        if validators and all(any(v) for v in validators):
+            # Every page carries the catalog total, so a catalog that grew or
+            # shrank changes all of them, not just the last one
+            skips = range(0, len(validators) * PAGE_SIZE, PAGE_SIZE)
+            checks = _get_pages(session, url, skips, timeout, max_workers,
+                                [_conditional_headers(*v) for v in validators])
+            if all(r.status_code == 304 for r in checks):
+                fresh = dict(cache, fetched_at=time.time())
+                fresh.pop('revalidate_failed_at', None)
+                return fresh
+        responses = [_get_page((session, url, 0, timeout, None))]
+        responses += _get_pages(session, url, _remaining_skips(responses[0].json()), timeout, max_workers)
+        pages = [r.json() for r in responses]
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error fetching data: {e}")
+        return None
+
+    return {
+        'url': url,
+        'fetched_at': time.time(),
+        # ETag / Last-Modified of each page, in catalog order
+        'validators': [[r.headers.get('ETag'), r.headers.get('Last-Modified')] for r in responses],
+        'mapping': create_product_mapping(p for page in pages for p in page.get('products', []))
+    }
+
+def _store(cache, cache_path):
+    with _lock:
+        _memo[cache_path] = cache
+        try:
+            _save_cache(cache, cache_path)
+        except OSError as e:
+            print(f"Warning: could not write product cache: {e}")
+
+def _record_failed_revalidation(cache, cache_path):
+    _store(dict(cache, revalidate_failed_at=time.time()), cache_path)
+
+def _background_revalidate(url, cache, cache_path, timeout):
+    try:
+        new_cache = _revalidate(url, cache, timeout)
+        if new_cache is not None:
+            _store(new_cache, cache_path)
+        else:
+            _record_failed_revalidation(cache, cache_path)
+    finally:
+        with _lock:
+            _revalidating.discard(cache_path)
+            _revalidate_threads.pop(threading.current_thread(), None)
+
+def wait_for_revalidation(timeout=REVALIDATE_EXIT_WAIT):
+    """
+    Waits up to `timeout` seconds in all for background revalidations to
+    finish. Call before exiting: the threads are daemons, so one still
+    running is cut off, losing only its temporary cache file. A cut-off
+    revalidation counts as failed, so the next runs back off.
+    """
+    deadline = time.monotonic() + timeout
+    with _lock:
+        threads = list(_revalidate_threads)
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0))
+    with _lock:
+        # Threads that finished meanwhile have stored their result and left
+        cut_off = [(_memo.get(path), path) for thread, path in _revalidate_threads.items()
+                   if thread.is_alive()]
+    for cache, cache_path in cut_off:
+        if cache is not None:
+            _record_failed_revalidation(cache, cache_path)
+
+def get_product_mapping(url=PRODUCTS_URL, cache_path=CACHE_PATH, ttl=CACHE_TTL,
+                        max_stale=CACHE_MAX_STALE, refresh=False, timeout=10):
+    """
+    Returns the product mapping (same shape as create_product_mapping),
+    using the in-process and on-disk caches where possible.
+    Returns {} only when there is no cached copy and the API is unreachable.
+    """
+    with _lock:
+        cache = _memo.get(cache_path)
+    if cache is None:
+        cache = _load_cache(cache_path)
+    if cache is not None and cache.get('url') != url:
+        cache = None
+
+    age = time.time() - cache['fetched_at'] if cache else None
+    if cache and not refresh:
+        if age < ttl:
+            with _lock:
+                _memo[cache_path] = cache
+            return cache['mapping']
+        if age < ttl + max_stale:
+            # Stale-while-revalidate: answer now, refresh the cache for next time,
+            # unless a recent revalidation failed
+            failed_at = cache.get('revalidate_failed_at')
+            backing_off = failed_at is not None and time.time() - failed_at < REVALIDATE_BACKOFF
+            with _lock:
+                _memo[cache_path] = cache
+                start = not backing_off and cache_path not in _revalidating
+                if start:
+                    _revalidating.add(cache_path)
+            if start:
+                print("Using cached product catalog; revalidating in the background...")
+                thread = threading.Thread(target=_background_revalidate, args=(url, cache, cache_path, timeout),
+                                          daemon=True)
+                with _lock:
+                    _revalidate_threads[thread] = cache_path
+                thread.start()
+            return cache['mapping']
+
+    print(f"Connecting to {url}...")
+    new_cache = _revalidate(url, cache, timeout)
+    if new_cache is not None:
+        _store(new_cache, cache_path)
+        print(f"Success! Product catalog has {len(new_cache['mapping'])} products.")
+        return new_cache['mapping']
+
+    if cache:
+        # Stale-if-error
+        print(f"Warning: API unavailable, using cached catalog from {age / 3600:.1f} hours ago.")
+        return cache['mapping']
+    return {}
+
+def clear_product_cache_memo():
+    with _lock:
+        _memo.clear()
@@ -0,0 +1,221 @@
+import glob
+import json
+import os
+import re
+import time
+from utils.file_handler import iter_sales_data, open_atomic, save_clean_data
+from utils.data_processor import (
+    iter_transactions,
+    iter_validated_transactions,
+    match_products,
+    generate_sales_report
+)
+from utils.aggregator import SalesAccumulator
+from utils.parallel import process_pool
+from utils.records import Transaction
+
+# ==========================================
+#          BATCH RUNS
+# ==========================================
+# Every input file is read, parsed and validated once (files in parallel),
+# then each filter spec becomes an independent report job: an index lookup
+# over that shared validated set. Jobs run in a process pool; each writes its report and
+# cleaned CSV to <output_dir>/<job name>/.
+
+FILTER_KEYS = {
+    'name': 'name',
+    'region': 'region',
+    'min': 'min_amount', 'min_amount': 'min_amount',
+    'max': 'max_amount', 'max_amount': 'max_amount'
+}
+
+def parse_filter_spec(text):
+    """
+    'name=north_big,region=North,min=500' -> filter dict.
+    Keys: name, region, min (min_amount), max (max_amount). Empty values are skipped.
+    """
+    spec = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        key, sep, value = part.partition('=')
+        key = key.strip().lower()
+        if not sep or key not in FILTER_KEYS:
+            raise ValueError(f"Invalid filter '{part}' (expected name=, region=, min= or max=)")
+        if value.strip():
+            spec[FILTER_KEYS[key]] = value.strip()
+    return normalize_filter(spec)
+
+def normalize_filter(spec):
+    spec = {FILTER_KEYS.get(k, k): v for k, v in spec.items()}
+    unknown = set(spec) - set(FILTER_KEYS.values())
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {', '.join(sorted(unknown))}")
+    for key in ('min_amount', 'max_amount'):
+        if spec.get(key) is not None:
+            try:
+                spec[key] = float(spec[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid number for {key}: {spec[key]!r}")
+    spec.setdefault('region', None)
+    spec.setdefault('min_amount', None)
+    spec.setdefault('max_amount', None)
+    if not spec.get('name'):
+        spec['name'] = filter_name(spec)
+    return spec
+
+def filter_name(spec):
+    parts = []
+    if spec.get('region'):
+        parts.append(spec['region'])
+    if spec.get('min_amount') is not None:
+        parts.append(f"min{spec['min_amount']:g}")
+    if spec.get('max_amount') is not None:
+        parts.append(f"max{spec['max_amount']:g}")
+    name = '_'.join(parts) or 'all'
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name)
+
+def load_batch_config(path):
+    """
+    Reads a JSON batch config:
+    {"inputs": ["data/*.txt"], "output_dir": "output/batch", "jobs": 4,
+     "filters": [{"name": "north", "region": "North", "min_amount": 100}]}
+    Every key is optional.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    inputs = config.get('inputs', [])
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    config['inputs'] = inputs
+    config['filters'] = [normalize_filter(dict(spec)) for spec in config.get('filters', [])]
+    return config
+
+def resolve_inputs(patterns):
+    """
+    Expands glob patterns into a sorted, de-duplicated list of files.
+    A pattern that matches nothing is kept as-is, so the reader reports it missing.
+    """
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def unique_names(filters):
+    seen = {}
+    for spec in filters:
+        name = spec['name']
+        if name in seen:
+            seen[name] += 1
+            spec['name'] = f"{name}-{seen[name]}"
+        else:
+            seen[name] = 1
+    return filters
+
+# ==========================================
+#          SHARED PARSE & VALIDATION
+# ==========================================
+
+def _load_file(path):
+    summary = dict.fromkeys(('total_input', 'invalid'), 0)
+    if not os.path.exists(path):
+        print(f"Error: The file '{path}' was not found.")
+        return [], summary
+    valid = iter_validated_transactions(iter_transactions(iter_sales_data(path)), summary)
+    # Columns are far cheaper to pickle back to the parent than record objects
+    return list(zip(*(t.values_tuple() for t in valid))), summary
+
+def load_validated(paths, workers=1):
+    """
+    Reads, parses and validates every file once (files in parallel when
+    workers > 1). Returns (valid transactions in input order, summary).
+    """
+    summary = dict.fromkeys(('total_input', 'invalid'), 0)
+    valid_data = []
+    if workers > 1 and len(paths) > 1:
+        with process_pool(min(workers, len(paths))) as pool:
+            parts = list(pool.map(_load_file, paths))
+    else:
+        parts = map(_load_file, paths)
+    for columns, part in parts:
+        if columns:
+            valid_data.extend(map(Transaction, *columns))
+        for key in summary:
+            summary[key] += part[key]
+    return valid_data, summary
+
+# ==========================================
+#          REPORT JOBS
+# ==========================================
+
+_shared = {}
+
+def _init_worker(index, product_mapping, base_summary):
+    # Forked workers inherit the parent's objects directly; under forkserver
+    # (see process_pool) they arrive pickled
+    _shared['index'] = index
+    _shared['products'] = product_mapping
+    _shared['summary'] = base_summary
+
+def run_report_job(spec, output_dir):
+    """
+    Filters the shared validated set with `spec`, enriches it and writes
+    <output_dir>/<name>/sales_report.txt and cleaned_sales_data.csv.
+    """
+    start = time.perf_counter()
+    job_dir = os.path.join(output_dir, spec['name'])
+    summary = dict(_shared['summary'])
+    filtered = _shared['index'].query(
+        region=spec['region'],
+        min_amount=spec['min_amount'],
+        max_amount=spec['max_amount'],
+        summary=summary
+    )
+    result = {'name': spec['name'], 'filter': spec, 'summary': summary, 'report': None}
+    if filtered:
+        enrichment = {}
+        match_products(filtered, _shared['products'], summary=enrichment)
+        stats = SalesAccumulator.from_transactions(filtered).add_enrichment_summary(enrichment)
+        result['report'] = os.path.join(job_dir, 'sales_report.txt')
+        result['cleaned_data'] = os.path.join(job_dir, 'cleaned_sales_data.csv')
+        result['enriched'] = stats.matched_count
+        result['total_revenue'] = stats.total_revenue
+        generate_sales_report(stats, output_file=result['report'])
+        save_clean_data(filtered, result['cleaned_data'])
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+def _run_job(args):
+    return run_report_job(*args)
+
+def run_batch(valid_data, base_summary, filters, output_dir, product_mapping=None, jobs=1):
+    """
+    Runs one report job per filter spec over `valid_data`, `jobs` at a time,
+    and writes <output_dir>/batch_summary.json. Returns the job results in
+    filter order.
+    """
+    from utils.index import TransactionIndex  # numpy / pandas, only needed here
+
+    filters = unique_names([dict(spec) for spec in filters] or [normalize_filter({})])
+    product_mapping = product_mapping or {}
+    args = [(spec, output_dir) for spec in filters]
+    index = TransactionIndex(valid_data)
+
+    if jobs > 1 and len(filters) > 1:
+        with process_pool(min(jobs, len(filters)), initializer=_init_worker,
+                          initargs=(index, product_mapping, base_summary)) as pool:
+            results = list(pool.map(_run_job, args))
+    else:
+        _init_worker(index, product_mapping, base_summary)
+        try:
+            results = [_run_job(a) for a in args]
+        finally:
+            _shared.clear()
+
+    # Written whole or not at all, like the per-job reports
+    with open_atomic(os.path.join(output_dir, 'batch_summary.json')) as f:
+        json.dump({'jobs': results}, f, indent=2)
+    return results
@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from utils.records import FIELDS, API_FIELDS, Transaction, EnrichedTransaction
+
+# ==========================================
+#          COLUMNAR BINARY OUTPUT
+# ==========================================
+# A column store is a directory holding one .npy file per column plus
+# meta.json. Numeric and boolean columns are stored as-is and memory-mapped
+# on load, so they are never parsed or copied. Text (and any column with
+# missing values) is dictionary-encoded: int32 codes in the .npy file and
+# the distinct values in <column>.values.json.
+#
+# Paths ending in .parquet or .feather are written with pyarrow instead,
+# when it is installed.
+
+STORE_VERSION = 1
+ARROW_SUFFIXES = ('.parquet', '.feather')
+
+_KINDS = {bool: 'bool', int: 'int64', float: 'float64'}
+
+def _encode(values):
+    """
+    Returns (kind, array, dictionary) for one column of Python values.
+    """
+    kind = _KINDS.get(type(values[0])) if values else None
+    if kind:
+        try:
+            array = np.array(values)
+        except OverflowError:
+            array = None
+        # Inferred dtype differs when types are mixed (e.g. ints among floats)
+        if array is not None and array.dtype == np.dtype(kind):
+            return kind, array, None
+    codes, uniques = pd.factorize(np.array(values, dtype=object))
+    uniques = uniques.tolist()
+    # Missing values get code -1 and are left out of `uniques`
+    if codes.min(initial=0) >= 0 and all(type(v) is str for v in uniques):
+        return 'dict', codes.astype(np.int32), uniques
+    # Plain dict rather than pd.factorize, which turns None into NaN.
+    # Keyed by type too, so 4 and 4.0 (or 1 and True) stay distinct.
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault((type(v), v), len(lookup)) for v in values),
+                        dtype=np.int32, count=len(values))
+    return 'dict', codes, [v for _, v in lookup]
+
+def _columns_of(transactions):
+    rows = transactions if isinstance(transactions, list) else list(transactions)
+    enriched = bool(rows) and 'API_Match' in rows[0]
+    names = FIELDS + API_FIELDS if enriched else FIELDS
+    if all(isinstance(row, Transaction) for row in rows):
+        columns = dict(zip(FIELDS, map(list, zip(*(row.values_tuple() for row in rows))))) if rows else {}
+    else:
+        columns = {name: [row[name] for row in rows] for name in FIELDS}
+    for name in names:
+        if name not in columns:
+            columns[name] = [row.get(name) for row in rows]
+    return names, columns
+
+def save_columnar(transactions, path):
+    """
+    Writes transactions (plain or enriched) as a column store directory,
+    or as Parquet / Feather when `path` ends in .parquet / .feather.
+    """
+    names, columns = _columns_of(transactions)
+    if path.endswith(ARROW_SUFFIXES):
+        return _save_arrow(names, columns, path)
+
+    # Build next to the target and swap in, so readers never see half a store
+    path = path.rstrip('/\\')
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    meta = {'version': STORE_VERSION, 'rows': len(columns[names[0]]), 'columns': []}
+    for name in names:
+        kind, array, dictionary = _encode(columns[name])
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        if dictionary is not None:
+            with open(os.path.join(tmp_path, f"{name}.values.json"), 'w', encoding='utf-8') as f:
+                f.write(json.dumps(dictionary))
+        meta['columns'].append({'name': name, 'kind': kind})
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    # Move the old store aside rather than deleting it first: the target is
+    # only missing between two renames, and comes back if the swap fails
+    old_path = path + '.old'
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(old_path):
+            os.replace(old_path, path)
+        raise
+    shutil.rmtree(old_path, ignore_errors=True)
+    print(f"Columnar data successfully saved to {path}")
+
+def _save_arrow(names, columns, path):
+    try:
+        import pyarrow  # noqa: F401  (pandas needs it for both formats)
+    except ImportError:
+        raise ImportError(f"writing {path} needs pyarrow (pip install pyarrow)") from None
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    df = pd.DataFrame({name: columns[name] for name in names}, columns=list(names))
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+    print(f"Columnar data successfully saved to {path}")
+
+class ColumnTable:
+    """
+    Columns loaded from a column store. Numeric columns are read-only
+    memory maps; dictionary-encoded columns are decoded on first access.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported column store version: {meta.get('version')}")
+        self.path = path
+        self.rows = meta['rows']
+        self.names = tuple(c['name'] for c in meta['columns'])
+        self.kinds = {c['name']: c['kind'] for c in meta['columns']}
+        self._raw = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in self.names}
+        self._decoded = {}
+
+    @property
+    def enriched(self):
+        return 'API_Match' in self.kinds
+
+    def column(self, name):
+        if self.kinds[name] != 'dict':
+            return self._raw[name]
+        if name not in self._decoded:
+            with open(os.path.join(self.path, f"{name}.values.json"), 'r', encoding='utf-8') as f:
+                dictionary = json.load(f)
+            values = np.empty(len(dictionary), dtype=object)
+            values[:] = dictionary
+            # Every row of a column shares one string object per distinct value
+            self._decoded[name] = values[np.asarray(self._raw[name])] if self.rows else values[:0]
+        return self._decoded[name]
+
+    def to_frame(self):
+        """
+        DataFrame over the columns (numeric ones stay memory-mapped),
+        ready for vectorized.FrameStats.
+        """
+        return pd.DataFrame({name: self.column(name) for name in self.names},
+                            columns=list(self.names), copy=False)
+
+    def iter_records(self):
+        """
+        Yields Transaction / EnrichedTransaction records in stored order.
+        """
+        base = [self.column(name).tolist() for name in FIELDS]
+        if not self.enriched:
+            yield from map(Transaction, *base)
+            return
+        extra = [self.column(name).tolist() for name in API_FIELDS]
+        infos = {}  # one shared side-table entry per distinct product info
+        for values in zip(*base, *extra):
+            category, brand, rating, match = values[8:]
+            info = None
+            if match:
+                key = (category, brand, rating)
+                info = infos.get(key)
+                if info is None:
+                    info = infos[key] = {'category': category, 'brand': brand, 'rating': rating}
+            yield EnrichedTransaction(*values[:8], product_info=info)
+
+def load_columnar(path):
+    """
+    Loads a column store directory (or a .parquet / .feather file) as a
+    ColumnTable, or a DataFrame for the pyarrow formats.
+    """
+    if path.endswith(ARROW_SUFFIXES):
+        return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_feather(path)
+    return ColumnTable(path)
@@ -1,317 +1,447 @@
-import pandas as pd
+import contextlib
 import datetime
+import gc
+import itertools
 import os
+import sys
+from utils.aggregator import SalesAccumulator
+from utils.file_handler import write_lines
+from utils.records import Transaction, EnrichedTransaction
 
 # ==========================================
 #          TASK 1: DATA PROCESSING
 # ==========================================
 
+PARSE_BATCH_SIZE = 50_000
+
+@contextlib.contextmanager
+def _gc_paused():
+    """
+    Pauses the cycle collector while a batch of records is built. Records
+    never form cycles, so collections triggered by the allocations could
+    free nothing.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _parse_batch(lines):
+    """
+    Parses a list of raw lines with the per-line rules: strip, exactly 8
+    '|'-separated fields, commas in the product name become spaces, commas
+    are dropped from Quantity / UnitPrice, and the row is skipped if int() /
+    float() reject them. Plain values skip the comma handling.
+    """
+    parsed = []
+    append = parsed.append
+    intern = sys.intern
+    with _gc_paused():
+        for line in lines:
+            parts = line.strip().split('|')
+            if len(parts) != 8:
+                continue
+            t_id, date, p_id, p_name, qty_str, price_str, c_id, region = parts
+            try:
+                qty = int(qty_str) if qty_str.isdecimal() else int(qty_str.replace(',', ''))
+                price = float(price_str.replace(',', '')) if ',' in price_str else float(price_str)
+            except ValueError:
+                continue
+            if ',' in p_name:
+                p_name = p_name.replace(',', ' ')
+            append(Transaction(t_id, intern(date), intern(p_id), intern(p_name),
+                               qty, price, intern(c_id), intern(region)))
+    return parsed
+
+def iter_transactions(raw_lines):
+    """
+    Lazily parses raw lines into Transaction records, skipping malformed rows.
+    Lines are parsed PARSE_BATCH_SIZE at a time with the garbage collector
+    paused for each batch.
+    """
+    lines = iter(raw_lines)
+    while True:
+        batch = list(itertools.islice(lines, PARSE_BATCH_SIZE))
+        if not batch:
+            return
+        yield from _parse_batch(batch)
+
 def parse_transactions(raw_lines):
-    cleaned_data = []
-    for line in raw_lines:
-        parts = line.strip().split('|')
-        if len(parts) != 8:
-            continue
-            
-        t_id, date, p_id, p_name, qty_str, price_str, c_id, region = parts
-        clean_p_name = p_name.replace(',', ' ')
-        try:
-            qty = int(qty_str.replace(',', ''))
-            price = float(price_str.replace(',', ''))
-        except ValueError:
-            continue
+    # Paused for the whole list, not just per batch: Transaction records are
+    # tracked by the collector (plain-value dicts were not), so every
+    # collection between batches would rescan all records built so far
+    with _gc_paused():
+        return list(iter_transactions(raw_lines))
 
-        row = {
-            'TransactionID': t_id, 'Date': date, 'ProductID': p_id,
-            'ProductName': clean_p_name, 'Quantity': qty, 'UnitPrice': price,
-            'CustomerID': c_id, 'Region': region
-        }
-        cleaned_data.append(row)
-    return cleaned_data
+SUMMARY_KEYS = ('total_input', 'invalid', 'filtered_by_region', 'filtered_by_amount', 'final_count')
+
+def is_valid_transaction(t):
+    return (t['Quantity'] > 0 and t['UnitPrice'] > 0 and
+            t['TransactionID'].startswith('T') and t['ProductID'].startswith('P') and
+            t['CustomerID'].startswith('C') and t['Region'].strip() != '')
+
+def iter_validated_transactions(transactions, summary=None):
+    """
+    Lazily drops invalid transactions, counting 'total_input' and 'invalid'
+    into `summary`. No filters are applied, so the result can be shared by
+    any number of filter runs (see iter_filtered_transactions).
+    """
+    if summary is None:
+        summary = {}
+    summary.setdefault('total_input', 0)
+    summary.setdefault('invalid', 0)
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
-    valid_pool = []
-    invalid_count = 0
     for t in transactions:
-        is_valid = (t['Quantity'] > 0 and t['UnitPrice'] > 0 and
-                    t['TransactionID'].startswith('T') and t['ProductID'].startswith('P') and
-                    t['CustomerID'].startswith('C') and t['Region'].strip() != '')
-        if is_valid:
-            valid_pool.append(t)
-        else:
-            invalid_count += 1
-            
-    filtered_list = []
-    filter_region_count = 0
-    filter_amount_count = 0
-    
-    for t in valid_pool:
+        summary['total_input'] += 1
+        if not is_valid_transaction(t):
+            summary['invalid'] += 1
+            continue
+        yield t
+
+def iter_filtered_transactions(valid_transactions, region=None, min_amount=None, max_amount=None, summary=None):
+    """
+    Lazily applies the region / amount filters to already-validated transactions,
+    counting 'filtered_by_region', 'filtered_by_amount' and 'final_count'.
+    """
+    if summary is None:
+        summary = {}
+    for key in ('filtered_by_region', 'filtered_by_amount', 'final_count'):
+        summary.setdefault(key, 0)
+
+    for t in valid_transactions:
         if region and t['Region'] != region:
-            filter_region_count += 1
+            summary['filtered_by_region'] += 1
             continue
         amount = t['Quantity'] * t['UnitPrice']
         if min_amount is not None and amount < min_amount:
-            filter_amount_count += 1
+            summary['filtered_by_amount'] += 1
             continue
         if max_amount is not None and amount > max_amount:
-            filter_amount_count += 1
+            summary['filtered_by_amount'] += 1
             continue
-        filtered_list.append(t)
+        summary['final_count'] += 1
+        yield t
 
-    summary = {
-        'total_input': len(transactions), 'invalid': invalid_count,
-        'filtered_by_region': filter_region_count, 'filtered_by_amount': filter_amount_count,
-        'final_count': len(filtered_list)
-    }
-    return filtered_list, invalid_count, summary
+def iter_valid_transactions(transactions, region=None, min_amount=None, max_amount=None, summary=None):
+    """
+    Lazily validates and filters transactions.
+    Counters are accumulated into `summary` (if given) as the stream is consumed.
+    """
+    if summary is None:
+        summary = {}
+    for key in SUMMARY_KEYS:
+        summary.setdefault(key, 0)
+    valid = iter_validated_transactions(transactions, summary)
+    return iter_filtered_transactions(valid, region, min_amount, max_amount, summary)
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    summary = {}
+    filtered_list = list(iter_valid_transactions(transactions, region, min_amount, max_amount, summary))
+    return filtered_list, summary['invalid'], summary
+
+def iter_collecting_filter_options(transactions, options):
+    """
+    Passes transactions through unchanged, filling `options` with what
+    get_filter_options() would return for them once the stream is consumed.
+    """
+    regions = set()
+    min_amt = max_amt = None
+    count = 0
+    for t in transactions:
+        count += 1
+        if t['Region']:
+            regions.add(t['Region'])
+        amount = t['Quantity'] * t['UnitPrice']
+        if min_amt is None or amount < min_amt: min_amt = amount
+        if max_amt is None or amount > max_amt: max_amt = amount
+        yield t
+
+    options.update({
+        'regions': sorted(regions), 'count': count,
+        'min_amount': min_amt if min_amt is not None else 0,
+        'max_amount': max_amt if max_amt is not None else 0
+    })
+
+def get_filter_options(transactions):
+    """
+    Collects the regions and amount range offered to the user, in one pass.
+    """
+    options = {}
+    for _ in iter_collecting_filter_options(transactions, options):
+        pass
+    return options
 
 # ==========================================
 #          TASK 2: ANALYTICS
 # ==========================================
 
+def _as_accumulator(transactions):
+    """
+    Returns `transactions` unchanged if it is already a SalesAccumulator,
+    otherwise folds the transactions into a new one in a single pass.
+    """
+    if isinstance(transactions, SalesAccumulator):
+        return transactions
+    return SalesAccumulator.from_transactions(transactions)
+
 def calculate_total_revenue(transactions):
-    return sum(t['Quantity'] * t['UnitPrice'] for t in transactions)
+    return _as_accumulator(transactions).total_revenue
 
 def region_wise_sales(transactions):
-    stats = {}
-    total_revenue = calculate_total_revenue(transactions)
-    for t in transactions:
-        r = t['Region']
-        sale = t['Quantity'] * t['UnitPrice']
-        if r not in stats: stats[r] = {'total_sales': 0.0, 'transaction_count': 0}
-        stats[r]['total_sales'] += sale
-        stats[r]['transaction_count'] += 1
-        
-    for r in stats:
-        sales = stats[r]['total_sales']
-        stats[r]['percentage'] = round((sales / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
-            
-    return dict(sorted(stats.items(), key=lambda item: item[1]['total_sales'], reverse=True))
+    return _as_accumulator(transactions).region_wise_sales()
 
 def top_selling_products(transactions, n=5):
-    product_stats = {}
-    for t in transactions:
-        p_name = t['ProductName']
-        qty = t['Quantity']
-        revenue = qty * t['UnitPrice']
-        if p_name not in product_stats: product_stats[p_name] = {'qty': 0, 'revenue': 0.0}
-        product_stats[p_name]['qty'] += qty
-        product_stats[p_name]['revenue'] += revenue
-        
-    result_list = [(k, v['qty'], v['revenue']) for k, v in product_stats.items()]
-    return sorted(result_list, key=lambda x: x[1], reverse=True)[:n]
+    return _as_accumulator(transactions).top_selling_products(n)
 
 def customer_analysis(transactions):
-    customer_stats = {}
-    for t in transactions:
-        c_id = t['CustomerID']
-        amt = t['Quantity'] * t['UnitPrice']
-        prod = t['ProductName']
-        if c_id not in customer_stats:
-            customer_stats[c_id] = {'total_spent': 0.0, 'purchase_count': 0, 'products_bought': set()}
-        customer_stats[c_id]['total_spent'] += amt
-        customer_stats[c_id]['purchase_count'] += 1
-        customer_stats[c_id]['products_bought'].add(prod)
-        
-    for c_id, stats in customer_stats.items():
-        stats['avg_order_value'] = round(stats['total_spent'] / stats['purchase_count'], 2) if stats['purchase_count'] > 0 else 0.0
-        stats['products_bought'] = list(stats['products_bought'])
-        
-    return dict(sorted(customer_stats.items(), key=lambda item: item[1]['total_spent'], reverse=True))
+    return _as_accumulator(transactions).customer_analysis()
 
 def daily_sales_trend(transactions):
-    date_stats = {}
-    for t in transactions:
-        date = t['Date']
-        revenue = t['Quantity'] * t['UnitPrice']
-        c_id = t['CustomerID']
-        if date not in date_stats:
-            date_stats[date] = {'revenue': 0.0, 'transaction_count': 0, 'unique_customers_set': set()}
-        date_stats[date]['revenue'] += revenue
-        date_stats[date]['transaction_count'] += 1
-        date_stats[date]['unique_customers_set'].add(c_id)
-        
-    final_stats = {}
-    for date in sorted(date_stats.keys()):
-        stats = date_stats[date]
-        final_stats[date] = {
-            'revenue': stats['revenue'],
-            'transaction_count': stats['transaction_count'],
-            'unique_customers': len(stats['unique_customers_set'])
-        }
-    return final_stats
+    return _as_accumulator(transactions).daily_sales_trend()
 
 def find_peak_sales_day(transactions):
-    daily_stats = daily_sales_trend(transactions)
-    if not daily_stats: return None
-    peak_date = max(daily_stats, key=lambda d: daily_stats[d]['revenue'])
-    return (peak_date, daily_stats[peak_date]['revenue'], daily_stats[peak_date]['transaction_count'])
+    return _as_accumulator(transactions).find_peak_sales_day()
 
 def low_performing_products(transactions, threshold=10):
-    product_stats = {}
-    for t in transactions:
-        p_name = t['ProductName']
-        qty = t['Quantity']
-        revenue = qty * t['UnitPrice']
-        if p_name not in product_stats: product_stats[p_name] = {'qty': 0, 'revenue': 0.0}
-        product_stats[p_name]['qty'] += qty
-        product_stats[p_name]['revenue'] += revenue
-        
-    result_list = [(k, v['qty'], v['revenue']) for k, v in product_stats.items() if v['qty'] < threshold]
-    return sorted(result_list, key=lambda x: x[1])
+    return _as_accumulator(transactions).low_performing_products(threshold)
 
 # ==========================================
 #          TASK 3: API ENRICHMENT
 # ==========================================
 
-def enrich_sales_data(transactions, product_mapping):
-    enriched_list = []
+def product_numeric_id(product_id):
+    """
+    'P101' -> 101, the key used by the API product mapping (-1 if not numeric).
+    """
+    try:
+        return int(product_id.upper().replace('P', ''))
+    except ValueError:
+        return -1
+
+def match_products(transactions, product_mapping, summary=None):
+    """
+    Returns each transaction's shared product_mapping entry (None when
+    unmatched), resolving every distinct ProductID against the mapping once.
+    `summary` receives 'enriched', 'matched' and 'missing_products'
+    (unmatched product names in first-seen order).
+    """
+    resolved = {}  # ProductID -> mapping entry, or None when unmatched
+    missing = {}
+    infos = []
+    append = infos.append
     for t in transactions:
-        row = t.copy()
-        try:
-            numeric_id = int(row['ProductID'].upper().replace('P', ''))
-        except ValueError:
-            numeric_id = -1
-            
-        if numeric_id in product_mapping:
-            info = product_mapping[numeric_id]
-            row.update({'API_Category': info['category'], 'API_Brand': info['brand'], 'API_Rating': info['rating'], 'API_Match': True})
-        else:
-            row.update({'API_Category': None, 'API_Brand': None, 'API_Rating': None, 'API_Match': False})
-        enriched_list.append(row)
-    return enriched_list
+        p_id = t['ProductID']
+        info = resolved.get(p_id, resolved)
+        if info is resolved:
+            info = resolved[p_id] = product_mapping.get(product_numeric_id(p_id))
+        if info is None:
+            missing[t['ProductName']] = None
+        append(info)
+    if summary is not None:
+        summary['enriched'] = len(infos)
+        summary['matched'] = len(infos) - infos.count(None)
+        summary['missing_products'] = list(missing)
+    return infos
+
+def enrich_sales_data(transactions, product_mapping, summary=None):
+    """
+    Returns EnrichedTransaction records that reference the shared
+    product_mapping entries instead of copying category/brand/rating per row.
+    The match stats are collected into `summary` on the way (see match_products),
+    so callers never rescan the result for them.
+    """
+    rows = transactions if isinstance(transactions, list) else list(transactions)
+    infos = match_products(rows, product_mapping, summary)
+    return list(map(EnrichedTransaction.from_mapping, rows, infos))
+
+def iter_enriched_transactions(transactions, product_mapping):
+    """
+    Lazy enrich_sales_data for one-shot streams: yields an EnrichedTransaction
+    per transaction, resolving every distinct ProductID against the mapping
+    once. Match stats are left to the consumer (SalesAccumulator.add counts
+    them from enriched rows).
+    """
+    resolved = {}  # ProductID -> mapping entry, or None when unmatched
+    for t in transactions:
+        p_id = t['ProductID']
+        info = resolved.get(p_id, resolved)
+        if info is resolved:
+            info = resolved[p_id] = product_mapping.get(product_numeric_id(p_id))
+        yield EnrichedTransaction.from_mapping(t, info)
 
 # ==========================================
 #          TASK 4: REPORT GENERATION
 # ==========================================
 
-def generate_sales_report(transactions, enriched_transactions, output_file='output/sales_report.txt'):
+def generate_sales_report(transactions, enriched_transactions=None, output_file='output/sales_report.txt',
+                          rollups=None):
     """
     Generates a comprehensive formatted text report.
+    `transactions` may be a list, a one-shot iterator or a prebuilt stats
+    object (SalesAccumulator, ApproxSalesAccumulator or vectorized.FrameStats);
+    enrichment stats are read from `enriched_transactions` when given.
+    With a rollups.DateRollups, monthly figures and moving revenue are added.
     """
-    if not transactions:
+    stats = transactions
+    if not hasattr(stats, 'region_wise_sales'):
+        stats = SalesAccumulator.from_transactions(transactions)
+        if enriched_transactions is not None:
+            stats.add_enrichment(enriched_transactions)
+
+    if not stats.transaction_count:
         print("No transactions to report.")
         return
 
-    # --- CALCULATIONS ---
-    total_rev = calculate_total_revenue(transactions)
-    total_txns = len(transactions)
+    try:
+        write_lines(_report_lines(stats, rollups), output_file, trailing_newline=False)
+        print(f"Detailed report successfully saved to {output_file}")
+    except Exception as e:
+        print(f"Error saving report: {e}")
+
+def _report_lines(stats, rollups=None):
+    """
+    Yields the report line by line; each section's figures are computed
+    when the writer reaches it.
+    """
+    total_rev = stats.total_revenue
+    total_txns = stats.transaction_count
     avg_order_val = total_rev / total_txns if total_txns > 0 else 0
-    
-    dates = [t['Date'] for t in transactions]
-    date_range = f"{min(dates)} to {max(dates)}" if dates else "N/A"
-    
-    region_stats = region_wise_sales(transactions)
-    top_prods = top_selling_products(transactions, n=5)
-    
-    cust_stats = customer_analysis(transactions)
-    # Get top 5 customers
-    top_custs = list(cust_stats.items())[:5]
-    
-    daily_stats = daily_sales_trend(transactions)
-    peak_day = find_peak_sales_day(transactions)
-    low_prods = low_performing_products(transactions, threshold=10)
-    
-    # Enrichment Stats
-    total_enriched = len(enriched_transactions)
-    success_count = sum(1 for t in enriched_transactions if t.get('API_Match') == True)
-    success_rate = (success_count / total_enriched * 100) if total_enriched > 0 else 0
-    missing_prods = list(set(t['ProductName'] for t in enriched_transactions if t.get('API_Match') == False))[:5]
+    date_range = f"{stats.min_date} to {stats.max_date}"
+    region_stats = stats.region_wise_sales()
 
-    # --- REPORT BUILDING ---
-    lines = []
-    lines.append("="*50)
-    lines.append(f"{'SALES ANALYTICS REPORT':^50}")
-    lines.append(f"{'Generated: ' + datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'):^50}")
-    lines.append(f"{'Records Processed: ' + str(total_txns):^50}")
-    lines.append("="*50 + "\n")
+    # Only sketch-backed stats (ApproxSalesAccumulator) carry error bounds
+    approx = stats.approximation_summary() if getattr(stats, 'approximate', False) else None
+
+    yield "="*50
+    yield f"{'SALES ANALYTICS REPORT':^50}"
+    yield f"{'Generated: ' + datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'):^50}"
+    yield f"{'Records Processed: ' + str(total_txns):^50}"
+    if approx:
+        yield f"{'NOTE: customer, product and unique-customer':^50}"
+        yield f"{'figures are approximate (see APPROXIMATION)':^50}"
+    yield "="*50 + "\n"
 
     # 2. OVERALL SUMMARY
-    lines.append("OVERALL SUMMARY")
-    lines.append("-" * 50)
-    lines.append(f"Total Revenue:       ${total_rev:,.2f}")
-    lines.append(f"Total Transactions:  {total_txns}")
-    lines.append(f"Average Order Value: ${avg_order_val:,.2f}")
-    lines.append(f"Date Range:          {date_range}\n")
+    yield "OVERALL SUMMARY"
+    yield "-" * 50
+    yield f"Total Revenue:       ${total_rev:,.2f}"
+    yield f"Total Transactions:  {total_txns}"
+    yield f"Average Order Value: ${avg_order_val:,.2f}"
+    yield f"Date Range:          {date_range}\n"
 
     # 3. REGION-WISE PERFORMANCE
-    lines.append("REGION-WISE PERFORMANCE")
-    lines.append("-" * 65)
-    lines.append(f"{'Region':<15} {'Sales':<15} {'% of Total':<15} {'Transactions':<15}")
-    lines.append("-" * 65)
+    yield "REGION-WISE PERFORMANCE"
+    yield "-" * 65
+    yield f"{'Region':<15} {'Sales':<15} {'% of Total':<15} {'Transactions':<15}"
+    yield "-" * 65
     for reg, data in region_stats.items():
-        lines.append(f"{reg:<15} ${data['total_sales']:<14,.2f} {data['percentage']:<14}% {data['transaction_count']:<15}")
-    lines.append("")
+        yield f"{reg:<15} ${data['total_sales']:<14,.2f} {data['percentage']:<14}% {data['transaction_count']:<15}"
+    yield ""
 
     # 4. TOP 5 PRODUCTS
-    lines.append("TOP 5 PRODUCTS")
-    lines.append("-" * 65)
-    lines.append(f"{'Rank':<5} {'Product Name':<25} {'Quantity':<10} {'Revenue':<15}")
-    lines.append("-" * 65)
-    for idx, (name, qty, rev) in enumerate(top_prods, 1):
-        lines.append(f"{idx:<5} {name:<25} {qty:<10} ${rev:,.2f}")
-    lines.append("")
+    yield "TOP 5 PRODUCTS"
+    yield "-" * 65
+    yield f"{'Rank':<5} {'Product Name':<25} {'Quantity':<10} {'Revenue':<15}"
+    yield "-" * 65
+    for idx, (name, qty, rev) in enumerate(stats.top_selling_products(n=5), 1):
+        yield f"{idx:<5} {name:<25} {qty:<10} ${rev:,.2f}"
+    yield ""
 
     # 5. TOP 5 CUSTOMERS
-    lines.append("TOP 5 CUSTOMERS")
-    lines.append("-" * 65)
-    lines.append(f"{'Rank':<5} {'Customer ID':<15} {'Total Spent':<15} {'Orders':<10}")
-    lines.append("-" * 65)
+    yield "TOP 5 CUSTOMERS"
+    yield "-" * 65
+    yield f"{'Rank':<5} {'Customer ID':<15} {'Total Spent':<15} {'Orders':<10}"
+    yield "-" * 65
+    top_custs = list(stats.customer_analysis().items())[:5]
     for idx, (cid, data) in enumerate(top_custs, 1):
-        lines.append(f"{idx:<5} {cid:<15} ${data['total_spent']:<14,.2f} {data['purchase_count']:<10}")
-    lines.append("")
-    
+        yield f"{idx:<5} {cid:<15} ${data['total_spent']:<14,.2f} {data['purchase_count']:<10}"
+    yield ""
+
     # 6. DAILY SALES TREND
-    lines.append("DAILY SALES TREND (Last 5 Days)")
-    lines.append("-" * 65)
-    lines.append(f"{'Date':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust':<15}")
-    lines.append("-" * 65)
-    for date, data in list(daily_stats.items()):
-        lines.append(f"{date:<15} ${data['revenue']:<14,.2f} {data['transaction_count']:<10} {data['unique_customers']:<15}")
-    lines.append("")
+    yield "DAILY SALES TREND (Last 5 Days)"
+    yield "-" * 65
+    yield f"{'Date':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust':<15}"
+    yield "-" * 65
+    for date, data in stats.daily_sales_trend().items():
+        yield f"{date:<15} ${data['revenue']:<14,.2f} {data['transaction_count']:<10} {data['unique_customers']:<15}"
+    yield ""
+
+    if rollups is not None:
+        yield "MONTHLY SALES"
+        yield "-" * 65
+        yield f"{'Month':<15} {'Revenue':<15} {'Txns':<10} {'Unique Cust':<15}"
+        yield "-" * 65
+        for month, data in rollups.buckets('month').items():
+            yield f"{month:<15} ${data['revenue']:<14,.2f} {data['transaction_count']:<10} {data['unique_customers']:<15}"
+        moving = {w: rollups.moving_revenue(w) for w in (7, 30)}
+        if moving[7]:
+            last_day = list(moving[7])[-1]
+            yield f"Moving Revenue ({last_day}): 7-day ${moving[7][last_day]:,.2f} | 30-day ${moving[30][last_day]:,.2f}"
+        yield ""
 
     # 7. PRODUCT PERFORMANCE ANALYSIS
-    lines.append("PRODUCT PERFORMANCE ANALYSIS")
-    lines.append("-" * 50)
+    yield "PRODUCT PERFORMANCE ANALYSIS"
+    yield "-" * 50
+    peak_day = stats.find_peak_sales_day()
     if peak_day:
-        lines.append(f"Best Selling Day:        {peak_day[0]} (${peak_day[1]:,.2f})")
-    
+        yield f"Best Selling Day:        {peak_day[0]} (${peak_day[1]:,.2f})"
+
+    low_prods = stats.low_performing_products(threshold=10)
     if low_prods:
         low_names = ", ".join([p[0] for p in low_prods[:3]])
-        lines.append(f"Low Performing Products: {low_names}...")
+        yield f"Low Performing Products: {low_names}..."
     else:
-        lines.append("Low Performing Products: None")
-        
-    lines.append("Avg Txn Value per Region:")
+        yield "Low Performing Products: None"
+
+    yield "Avg Txn Value per Region:"
     for reg, data in region_stats.items():
         avg_reg = data['total_sales'] / data['transaction_count'] if data['transaction_count'] > 0 else 0
-        lines.append(f"  - {reg}: ${avg_reg:,.2f}")
-    lines.append("")
+        yield f"  - {reg}: ${avg_reg:,.2f}"
+    yield ""
+
+    if approx:
+        # Sketch-based figures and their error bounds
+        quantiles = approx['order_value_quantiles']
+        yield "APPROXIMATION"
+        yield "-" * 50
+        yield (f"Distinct Customers:  ~{approx['distinct_customers']:,} "
+               f"(±{approx['distinct_customers_error']:.1%} std. error)")
+        yield f"Daily Unique Cust:   ±{approx['daily_customers_error']:.1%} std. error"
+        yield f"Order Value p50/p90/p99: ${quantiles[0.5]:,.2f} / ${quantiles[0.9]:,.2f} / ${quantiles[0.99]:,.2f}"
+        if approx['exact_customers']:
+            yield "Top Customers:       exact (every customer tracked)"
+        else:
+            yield f"Top Customers:       spend overestimated by at most ${approx['customer_error']:,.2f}"
+        if approx['exact_products']:
+            yield "Top Products:        exact (every product tracked)"
+        else:
+            yield f"Top Products:        quantity overestimated by at most {approx['product_error']:,.0f}"
+        yield ""
 
     # 8. API ENRICHMENT SUMMARY
-    lines.append("API ENRICHMENT SUMMARY")
-    lines.append("-" * 50)
-    lines.append(f"Total Products Enriched: {total_enriched}")
-    lines.append(f"Successful Matches:      {success_count}")
-    lines.append(f"Success Rate:            {success_rate:.2f}%")
+    total_enriched = stats.enriched_count
+    success_count = stats.matched_count
+    success_rate = (success_count / total_enriched * 100) if total_enriched > 0 else 0
+    missing_prods = list(stats.missing_products)[:5]
+    yield "API ENRICHMENT SUMMARY"
+    yield "-" * 50
+    yield f"Total Products Enriched: {total_enriched}"
+    yield f"Successful Matches:      {success_count}"
+    yield f"Success Rate:            {success_rate:.2f}%"
     if missing_prods:
-        lines.append(f"Missing Products (Sample): {', '.join(missing_prods)}")
-    lines.append("="*50)
-
-    # WRITE TO FILE
-    try:
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write("\n".join(lines))
-        print(f"Detailed report successfully saved to {output_file}")
-    except Exception as e:
-        print(f"Error saving report: {e}")
+        yield f"Missing Products (Sample): {', '.join(missing_prods)}"
+    yield "="*50
 
 # ==========================================
 #          MAIN WRAPPER
 # ==========================================
 
 def process_data(raw_lines):
+    import pandas as pd
+
     parsed_data = parse_transactions(raw_lines)
     valid_data, _, summary = validate_and_filter(parsed_data)
     
@@ -1,81 +1,337 @@
+import codecs
+import contextlib
+import csv
+import gzip
+import io
+import json
 import os
+import threading
+from itertools import chain, islice
+from utils.aggregator import accumulator_from_state
+from utils.records import FIELDS, API_FIELDS, Transaction, EnrichedTransaction
 
-def read_sales_data(filename):
+ENCODINGS_TO_TRY = ['utf-8', 'latin-1', 'cp1252']
+CHUNK_SIZE = 1024 * 1024  # 1 MB read buffer for streaming
+SAMPLE_SIZE = 64 * 1024
+# Column order of the enriched pipe-delimited file
+ENRICHED_HEADER = FIELDS + API_FIELDS
+
+def _decodes(filename, encoding, chunk_size=CHUNK_SIZE):
     """
-    Reads sales data handling encoding issues.
+    True if the whole file decodes with `encoding`, checked in fixed-size
+    chunks so memory stays bounded.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def detect_encoding(filename, chunk_size=CHUNK_SIZE):
+    """
+    Returns the first encoding that decodes the whole file, or None.
+    """
+    for encoding in ENCODINGS_TO_TRY:
+        if _decodes(filename, encoding, chunk_size):
+            return encoding
+    return None
+
+def iter_sales_data(filename, chunk_size=CHUNK_SIZE):
+    """
+    Streams sales data one stripped line at a time.
+    Yields exactly the lines read_sales_data returns: the first encoding
+    from sample_encodings that decodes the whole file. ASCII lines read the
+    same in every candidate, so they are yielded straight away; the first
+    non-ASCII line waits until the whole file is known to decode.
     """
     if not os.path.exists(filename):
         print(f"Error: The file '{filename}' was not found.")
-        return []
+        return
 
-    encodings_to_try = ['utf-8', 'latin-1', 'cp1252']
-    
-    for encoding in encodings_to_try:
+    consumed = 0
+    checked = False
+    for encoding in sample_encodings(filename):
         try:
-            with open(filename, 'r', encoding=encoding) as f:
-                lines = f.readlines()
-            # Skip header (lines[1:]) and ignore empty lines
-            clean_lines = [line.strip() for line in lines[1:] if line.strip()]
-            return clean_lines
+            with open(filename, 'r', encoding=encoding, buffering=chunk_size) as f:
+                next(f, None)  # Skip header
+                for line in islice(f, consumed, None):
+                    if not checked and not line.isascii():
+                        if not _decodes(filename, encoding, chunk_size):
+                            raise UnicodeDecodeError(encoding, b'', 0, 1, "later bytes do not decode")
+                        checked = True
+                    consumed += 1
+                    line = line.strip()
+                    if line:
+                        yield line
+            return
         except UnicodeDecodeError:
+            # Everything yielded so far was ASCII: carrying on from the same
+            # line with the next candidate is the same as starting over
             continue
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            return []
-            
     print("Error: Could not read the file.")
-    return []
+
+def iter_sales_data_range(filename, encoding, start, end, chunk_size=CHUNK_SIZE):
+    """
+    Streams stripped, non-empty lines from the byte range [start, end).
+    `start` must be the beginning of a line (e.g. just after the header).
+    """
+    with open(filename, 'rb', buffering=chunk_size) as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            raw = f.readline(remaining)
+            if not raw:
+                break
+            remaining -= len(raw)
+            text = raw.decode(encoding)
+            # Same universal-newline handling as text mode
+            parts = text.replace('\r\n', '\n').replace('\r', '\n').split('\n') if '\r' in text else (text,)
+            for line in parts:
+                line = line.strip()
+                if line:
+                    yield line
+
+def sample_encodings(filename, sample_size=SAMPLE_SIZE):
+    """
+    ENCODINGS_TO_TRY minus those that already fail on the file's leading bytes.
+    """
+    with open(filename, 'rb') as f:
+        sample = f.read(sample_size)
+    candidates = []
+    for encoding in ENCODINGS_TO_TRY:
+        try:
+            # Incremental decode: a multi-byte character cut at the end of the sample is fine
+            codecs.getincrementaldecoder(encoding)().decode(sample)
+            candidates.append(encoding)
+        except UnicodeDecodeError:
+            continue
+    return candidates
+
+def read_sales_data(filename):
+    """
+    Reads sales data handling encoding issues.
+    Returns the same stripped, non-empty lines after the header as
+    iter_sales_data. The encoding is picked from a sample and the file is
+    decoded once while reading; a decode error later in the file starts it
+    over with the next encoding.
+    """
+    try:
+        if not os.path.exists(filename):
+            print(f"Error: The file '{filename}' was not found.")
+            return []
+
+        for encoding in sample_encodings(filename):
+            try:
+                with open(filename, 'r', encoding=encoding, buffering=CHUNK_SIZE) as f:
+                    next(f, None)  # Skip header
+                    return [line for line in map(str.strip, f) if line]
+            except UnicodeDecodeError:
+                continue
+        print("Error: Could not read the file.")
+        return []
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        return []
+
+def save_aggregate_state(accumulator, output_path):
+    """
+    Saves a SalesAccumulator (or ApproxSalesAccumulator) as JSON so it can
+    be merged with others later.
+    """
+    with open_atomic(output_path) as f:
+        json.dump(accumulator.to_state(), f)
+    print(f"Aggregate state successfully saved to {output_path}")
+
+def save_rollups(rollups, output_path):
+    """
+    Saves every DateRollups level (day to quarter) and the 7/30-day moving revenue as JSON.
+    """
+    with open_atomic(output_path) as f:
+        json.dump(rollups.to_dict(), f, indent=2)
+    print(f"Date rollups successfully saved to {output_path}")
+
+def load_aggregate_state(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return accumulator_from_state(json.load(f))
 
 def save_report(report_text, output_path):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w') as f:
+    with open_atomic(output_path) as f:
         f.write(report_text)
     print(f"Report successfully saved to {output_path}")
 
-def save_clean_data(df, output_path):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
+# ==========================================
+#          STREAMING OUTPUT WRITERS
+# ==========================================
+# Writers consume records as a stream, so no DataFrame or second copy of the
+# data is built. Output goes through a WRITE_BUFFER_SIZE buffer, or is joined
+# WRITE_BATCH_ROWS lines per write call. Every file is written under a
+# temporary name next to its destination and renamed over it only once it is
+# complete, so a failed run never leaves a truncated file behind. Paths
+# ending in '.gz' or '.zst' are compressed as they are written. zstd needs
+# the optional zstandard package.
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+WRITE_BATCH_ROWS = 20_000
+GZIP_LEVEL = 6   # most of level 9's ratio at a fraction of its cost
+ZSTD_LEVEL = 3
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+def _text_stream(raw, output_path, newline):
+    if output_path.endswith('.gz'):
+        # Named after the final file (GzipFile drops the .gz), not the temporary one
+        stream = gzip.GzipFile(filename=os.path.basename(output_path), mode='wb',
+                               fileobj=raw, compresslevel=GZIP_LEVEL)
+    elif output_path.endswith('.zst'):
+        import zstandard
+        stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+    else:
+        stream = raw
+    return io.TextIOWrapper(stream, encoding='utf-8', newline=newline)
+
+@contextlib.contextmanager
+def open_atomic(output_path, newline=None):
+    """
+    Text file that becomes `output_path` when the block exits cleanly. On an
+    error the temporary file is removed and any previous output is kept.
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb', buffering=WRITE_BUFFER_SIZE) as raw:
+            with _text_stream(raw, output_path, newline) as f:
+                yield f
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+def write_lines(lines, output_path, trailing_newline=True):
+    """
+    Writes an iterable of lines separated by '\n', WRITE_BATCH_ROWS at a
+    time. Returns the number of lines written.
+    """
+    lines = iter(lines)
+    count = 0
+    with open_atomic(output_path) as f:
+        separator = ''
+        while True:
+            batch = list(islice(lines, WRITE_BATCH_ROWS))
+            if not batch:
+                break
+            f.write(separator + '\n'.join(batch))
+            separator = '\n'
+            count += len(batch)
+        if count and trailing_newline:
+            f.write('\n')
+    return count
+
+def _row_values(fields):
+    if tuple(fields) == FIELDS:
+        # Transaction records hand over their values without per-field lookups
+        return lambda t: t.values_tuple() if isinstance(t, Transaction) else [t.get(col) for col in FIELDS]
+    return lambda t: [t.get(col) for col in fields]
+
+def write_csv(records, output_path, fields=None):
+    """
+    Streams mapping records to CSV with the csv module. For parsed
+    transactions the bytes match pd.DataFrame(records).to_csv(output_path,
+    index=False): columns in the first record's order, str() of each value,
+    minimal quoting and '\n' line endings. Returns the number of rows written.
+    """
+    records = iter(records)
+    first = next(records, None)
+    if fields is None:
+        fields = list(first.keys()) if first is not None else []
+    row_values = _row_values(fields)
+    count = 0
+    with open_atomic(output_path, newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(fields)
+        if first is not None:
+            writer.writerow(row_values(first))
+            count = 1
+            for batch in iter(lambda: list(islice(records, WRITE_BATCH_ROWS)), []):
+                writer.writerows(map(row_values, batch))
+                count += len(batch)
+    return count
+
+def save_clean_data(data, output_path):
+    """
+    `data` is an iterable of transaction records (streamed with write_csv)
+    or a DataFrame (written with to_csv).
+    """
+    if hasattr(data, 'to_csv'):
+        with open_atomic(output_path, newline='') as f:
+            data.to_csv(f, index=False, lineterminator='\n')
+    else:
+        write_csv(data, output_path)
     print(f"Cleaned data successfully saved to {output_path}")
 
+def _enriched_lines(rows):
+    """
+    Pipe-delimited ENRICHED_HEADER lines, None written as 'None'. The API
+    columns of an EnrichedTransaction come from its shared product_info, so
+    they are formatted once per product rather than once per row.
+    """
+    api_parts = {}  # id(product_info) -> (product_info, '|category|brand|rating|match')
+    for row in rows:
+        if isinstance(row, EnrichedTransaction):
+            info = row.product_info
+            cached = api_parts.get(id(info))
+            if cached is None:
+                cached = api_parts[id(info)] = (info, '|' + '|'.join([str(row[col]) for col in API_FIELDS]))
+            yield '|'.join(map(str, row.values_tuple())) + cached[1]
+        else:
+            yield '|'.join([str(row.get(col)) for col in ENRICHED_HEADER])
+
+def save_clean_and_enriched_data(enriched_transactions, clean_path, enriched_path):
+    """
+    Writes the cleaned CSV and the enriched file side by side in one pass
+    over EnrichedTransaction records (any iterable, consumed once), holding
+    WRITE_BATCH_ROWS rows at a time. The bytes match save_clean_data() and
+    save_enriched_data(). Writes nothing and returns 0 when there are no rows,
+    else the number of rows.
+    """
+    rows = iter(enriched_transactions)
+    first = next(rows, None)
+    if first is None:
+        return 0
+
+    rows = chain([first], rows)
+    count = 0
+    with open_atomic(clean_path, newline='') as clean, open_atomic(enriched_path) as enriched:
+        writer = csv.writer(clean, lineterminator='\n')
+        writer.writerow(FIELDS)
+        enriched.write('|'.join(ENRICHED_HEADER))
+        for batch in iter(lambda: list(islice(rows, WRITE_BATCH_ROWS)), []):
+            writer.writerows(t.values_tuple() for t in batch)
+            enriched.write('\n' + '\n'.join(_enriched_lines(batch)))
+            count += len(batch)
+        enriched.write('\n')
+    print(f"Cleaned data successfully saved to {clean_path}")
+    print(f"Enriched data successfully saved to {enriched_path}")
+    return count
+
 # --- NEW FUNCTION FOR TASK 3.2 ---
 def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
     """
-    Saves enriched transactions back to file.
+    Saves enriched transactions (any iterable, consumed once) back to file.
     """
-    if not enriched_transactions:
+    rows = iter(enriched_transactions)
+    first = next(rows, None)
+    if first is None:
         print("No enriched data to save.")
         return
 
-    # Define the exact column order required
-    header = [
-        "TransactionID", "Date", "ProductID", "ProductName", 
-        "Quantity", "UnitPrice", "CustomerID", "Region", 
-        "API_Category", "API_Brand", "API_Rating", "API_Match"
-    ]
-    
     try:
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            # Write Header
-            f.write('|'.join(header) + '\n')
-            
-            # Write Rows
-            for row in enriched_transactions:
-                line_parts = []
-                for col in header:
-                    val = row.get(col)
-                    # Handle None values by converting to empty string or string 'None'
-                    # The screenshot implies strict pipe separation
-                    if val is None:
-                        line_parts.append("None") # Or "" depending on preference, usually "None" or empty
-                    else:
-                        line_parts.append(str(val))
-                
-                f.write('|'.join(line_parts) + '\n')
-                
+        lines = chain(['|'.join(ENRICHED_HEADER)], _enriched_lines(chain([first], rows)))
+        write_lines(lines, filename)
         print(f"Enriched data successfully saved to {filename}")
-        
+
     except Exception as e:
-        print(f"Error saving enriched data: {e}")
\ No newline at end of file
+        print(f"Error saving enriched data: {e}")
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from utils.aggregator import SalesAccumulator
+from utils.file_handler import CHUNK_SIZE, detect_encoding, iter_sales_data_range, open_atomic
+from utils.data_processor import SUMMARY_KEYS, iter_transactions, iter_valid_transactions, enrich_sales_data
+
+# ==========================================
+#          INCREMENTAL REPORT UPDATES
+# ==========================================
+# The state file stores the aggregates of every complete line processed so
+# far plus the byte offset just past the last of those lines. Each run only
+# reads the bytes appended since then. A fingerprint of the first and last
+# bytes already processed tells an appended file from a replaced one.
+
+STATE_VERSION = 2
+FINGERPRINT_BYTES = 4096
+
+def _header_end(filename):
+    with open(filename, 'rb') as f:
+        header = f.readline()
+    return len(header), header.decode('latin-1')
+
+def _last_line_end(filename, start, size):
+    """
+    Returns the offset just past the last b'\\n' in [start, size), or `start`.
+    """
+    with open(filename, 'rb') as f:
+        pos = size
+        while pos > start:
+            block = min(CHUNK_SIZE, pos - start)
+            f.seek(pos - block)
+            i = f.read(block).rfind(b'\n')
+            if i != -1:
+                return pos - block + i + 1
+            pos -= block
+    return start
+
+def _fingerprint(filename, offset):
+    """
+    Hash of the first and the last FINGERPRINT_BYTES of the file's first
+    `offset` bytes: unchanged by appends, changed by almost any rewrite.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        digest.update(f.read(min(offset, FINGERPRINT_BYTES)))
+        f.seek(max(offset - FINGERPRINT_BYTES, 0))
+        digest.update(f.read(offset - f.tell()))
+    return digest.hexdigest()
+
+def _new_state(filename):
+    offset, header = _header_end(filename)
+    return {
+        'version': STATE_VERSION,
+        'input': os.path.abspath(filename),
+        'header': header,
+        'encoding': detect_encoding(filename),
+        'offset': offset,
+        'fingerprint': _fingerprint(filename, offset),
+        'summary': dict.fromkeys(SUMMARY_KEYS, 0),
+        'aggregates': SalesAccumulator().to_state()
+    }
+
+def load_incremental_state(state_path, filename):
+    """
+    Loads the saved state for `filename`, or starts a fresh one when there is
+    none or the input was replaced, truncated or re-encoded.
+    """
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if (state.get('version') == STATE_VERSION
+                and state.get('input') == os.path.abspath(filename)
+                and state.get('header') == _header_end(filename)[1]
+                and state['offset'] <= os.path.getsize(filename)
+                and state.get('fingerprint') == _fingerprint(filename, state['offset'])):
+            return state
+        print("   ! Saved state does not match the input file. Rebuilding from scratch.")
+    return _new_state(filename)
+
+def save_incremental_state(state, state_path):
+    with open_atomic(state_path) as f:
+        json.dump(state, f)
+
+def _fold(accumulator, summary, lines, product_mapping):
+    valid = iter_valid_transactions(iter_transactions(lines), summary=summary)
+    for t in enrich_sales_data(valid, product_mapping):
+        accumulator.add(t)
+
+def update_incremental(filename, state_path, product_mapping=None):
+    """
+    Folds the lines appended to `filename` since the last run into the saved
+    aggregates and persists them. Returns (accumulator, summary, new_bytes).
+
+    A trailing line without a newline may still be being written, so it is
+    counted in the returned accumulator but not in the saved state; it is
+    read again on the next run.
+    """
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return None, None, 0
+
+    product_mapping = product_mapping or {}
+    state = load_incremental_state(state_path, filename)
+    if state['encoding'] is None:
+        print("Error: Could not read the file.")
+        return None, None, 0
+
+    accumulator = SalesAccumulator.from_state(state['aggregates'])
+    summary = state['summary']
+    start = state['offset']
+    size = os.path.getsize(filename)
+    end = _last_line_end(filename, start, size)
+
+    try:
+        _fold(accumulator, summary, iter_sales_data_range(filename, state['encoding'], start, end), product_mapping)
+    except UnicodeDecodeError:
+        # New bytes don't fit the encoding detected earlier: start over
+        print("   ! New data changed the file encoding. Rebuilding from scratch.")
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return update_incremental(filename, state_path, product_mapping)
+
+    state['offset'] = end
+    state['fingerprint'] = _fingerprint(filename, end)
+    state['summary'] = summary
+    state['aggregates'] = accumulator.to_state()
+    save_incremental_state(state, state_path)
+
+    if end < size:
+        summary = dict(summary)
+        try:
+            _fold(accumulator, summary, iter_sales_data_range(filename, state['encoding'], end, size), product_mapping)
+        except UnicodeDecodeError:
+            pass  # Partial multi-byte character still being written
+    return accumulator, summary, size - start
@@ -0,0 +1,184 @@
+from functools import cached_property
+import numpy as np
+import pandas as pd
+
+# ==========================================
+#          INDEXED QUERIES
+# ==========================================
+# Built once over the parsed transactions. Region / CustomerID / ProductID
+# map to the sorted row positions holding that value; amounts and dates are
+# kept in sorted order so a range is two binary searches. A query starts
+# from the smallest candidate set and checks the remaining predicates on
+# those rows only, so its cost follows the result size, not the table size.
+# Rows come back in their original order, exactly as iter_filtered_transactions
+# would yield them. Only rows passing `valid` are ever returned; the others
+# are still counted in the region / amount metadata, which gives the same
+# filter options as get_filter_options() over every parsed row. Those two
+# indexes are built up front; the others on first use.
+
+def _hash_index(values, valid):
+    """
+    {value: sorted array of the valid positions holding it}, per-row codes and {value: code}.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))
+    index = {}
+    start = 0
+    for value, end in zip(uniques, bounds):
+        positions = order[start:end]
+        index[value] = positions[valid[positions]]
+        start = end
+    return index, codes, {value: i for i, value in enumerate(uniques)}
+
+class TransactionIndex:
+    def __init__(self, transactions, valid=None):
+        """
+        `valid(t)` picks the rows queries may return (default: all of them).
+        """
+        self.rows = transactions if isinstance(transactions, list) else list(transactions)
+        rows = self.rows
+        if valid is None:
+            self.valid = np.ones(len(rows), dtype=bool)
+        else:
+            self.valid = np.fromiter(map(valid, rows), dtype=bool, count=len(rows))
+        # Number of rows a query can return
+        self.count = int(np.count_nonzero(self.valid))
+
+        self.by_region, self.region_codes, self.region_code = _hash_index([t['Region'] for t in rows], self.valid)
+
+        # Same float product as iter_filtered_transactions computes per row
+        self.amounts = np.fromiter((t['Quantity'] * t['UnitPrice'] for t in rows),
+                                   dtype=np.float64, count=len(rows))
+        order = np.argsort(self.amounts, kind='stable')
+        sorted_amounts = self.amounts[order]
+        self._amount_bounds = (sorted_amounts[0], sorted_amounts[-1]) if len(rows) else (0, 0)
+        self.amount_order = order[self.valid[order]]
+        self.sorted_amounts = self.amounts[self.amount_order]
+
+    def filter_options(self):
+        """
+        Same as get_filter_options() over every indexed row, valid or not,
+        read from the region and amount indexes.
+        """
+        min_amount, max_amount = self._amount_bounds
+        return {
+            'regions': sorted(region for region in self.region_code if region),
+            'count': len(self.rows),
+            'min_amount': float(min_amount), 'max_amount': float(max_amount)
+        }
+
+    @cached_property
+    def by_customer(self):
+        return _hash_index([t['CustomerID'] for t in self.rows], self.valid)[0]
+
+    @cached_property
+    def by_product(self):
+        return _hash_index([t['ProductID'] for t in self.rows], self.valid)[0]
+
+    @cached_property
+    def _date_index(self):
+        # Codes follow sorted date order, so a date range is a contiguous code range
+        codes, uniques = pd.factorize(pd.Series([t['Date'] for t in self.rows], dtype=object),
+                                      sort=True, use_na_sentinel=False)
+        order = np.argsort(codes, kind='stable')
+        order = order[self.valid[order]]
+        starts = np.concatenate(([0], np.cumsum(np.bincount(codes[order], minlength=len(uniques)))))
+        return codes, np.asarray(uniques, dtype=object), starts, order
+
+    def _date_codes(self, start_date=None, end_date=None):
+        _, uniques, _, _ = self._date_index
+        lo = 0 if start_date is None else np.searchsorted(uniques, start_date, side='left')
+        hi = len(uniques) if end_date is None else np.searchsorted(uniques, end_date, side='right')
+        return lo, max(lo, hi)
+
+    def amount_range(self, min_amount=None, max_amount=None):
+        lo = 0 if min_amount is None else np.searchsorted(self.sorted_amounts, min_amount, side='left')
+        hi = self.count if max_amount is None else np.searchsorted(self.sorted_amounts, max_amount, side='right')
+        return self.amount_order[lo:max(lo, hi)]
+
+    def date_range(self, start_date=None, end_date=None):
+        """
+        Positions with start_date <= Date <= end_date ('YYYY-MM-DD' strings).
+        """
+        _, _, starts, order = self._date_index
+        lo, hi = self._date_codes(start_date, end_date)
+        return order[starts[lo]:starts[hi]]
+
+    def _lookup(self, index, value):
+        return index.get(value, np.empty(0, dtype=np.intp))
+
+    def positions(self, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None,
+                  customer_id=None, product_id=None, summary=None):
+        """
+        Sorted row positions matching every given predicate.
+        `summary` receives the same filter counters as iter_filtered_transactions;
+        rows dropped only by the date / customer / product predicates are
+        counted as 'filtered_by_query'.
+        """
+        # (candidate positions, row mask over a positions array) per predicate
+        predicates = {}
+        if region:
+            code = self.region_code.get(region, -1)
+            predicates['region'] = (self._lookup(self.by_region, region),
+                                    lambda p: self.region_codes[p] == code)
+        if min_amount is not None or max_amount is not None:
+            lo = -np.inf if min_amount is None else min_amount
+            hi = np.inf if max_amount is None else max_amount
+            predicates['amount'] = (self.amount_range(min_amount, max_amount),
+                                    lambda p: (self.amounts[p] >= lo) & (self.amounts[p] <= hi))
+        if start_date is not None or end_date is not None:
+            predicates['date'] = (self.date_range(start_date, end_date),
+                                  lambda p: self._date_mask(p, start_date, end_date))
+        if customer_id is not None:
+            predicates['customer'] = (self._lookup(self.by_customer, customer_id),
+                                      lambda p: np.isin(p, self._lookup(self.by_customer, customer_id)))
+        if product_id is not None:
+            predicates['product'] = (self._lookup(self.by_product, product_id),
+                                     lambda p: np.isin(p, self._lookup(self.by_product, product_id)))
+
+        if not predicates:
+            result = np.flatnonzero(self.valid)
+        else:
+            name = min(predicates, key=lambda k: len(predicates[k][0]))
+            result = np.sort(predicates[name][0])
+            for other, (_, mask) in predicates.items():
+                if other != name and len(result):
+                    result = result[mask(result)]
+
+        if summary is not None:
+            for key in ('filtered_by_region', 'filtered_by_amount', 'final_count'):
+                summary.setdefault(key, 0)
+            region_count = len(predicates['region'][0]) if 'region' in predicates else self.count
+            region_amount_count = self._count_both(predicates)
+            summary['filtered_by_region'] += self.count - region_count
+            summary['filtered_by_amount'] += region_count - region_amount_count
+            if region_amount_count != len(result):
+                summary['filtered_by_query'] = summary.get('filtered_by_query', 0) + region_amount_count - len(result)
+            summary['final_count'] += len(result)
+        return result
+
+    def _date_mask(self, positions, start_date, end_date):
+        codes = self._date_index[0][positions]
+        lo, hi = self._date_codes(start_date, end_date)
+        return (codes >= lo) & (codes < hi)
+
+    def _count_both(self, predicates):
+        if 'region' not in predicates and 'amount' not in predicates:
+            return self.count
+        if 'amount' not in predicates:
+            return len(predicates['region'][0])
+        if 'region' not in predicates:
+            return len(predicates['amount'][0])
+        (r_pos, r_mask), (a_pos, a_mask) = predicates['region'], predicates['amount']
+        # Count on whichever side is smaller
+        if len(r_pos) <= len(a_pos):
+            return int(np.count_nonzero(a_mask(r_pos)))
+        return int(np.count_nonzero(r_mask(a_pos)))
+
+    def query(self, summary=None, **predicates):
+        """
+        Transactions matching the predicates (see positions()), in original order.
+        """
+        rows = self.rows
+        return [rows[i] for i in self.positions(summary=summary, **predicates).tolist()]
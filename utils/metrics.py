@@ -0,0 +1,175 @@
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ==========================================
+#          PIPELINE INSTRUMENTATION
+# ==========================================
+# Wrap each pipeline stage in `with metrics.stage('parse', rows_in=n) as s:`
+# and set s['rows_out'] / s['bytes_read'] / s['bytes_written'] inside.
+# Wall and CPU time, memory (and optionally tracemalloc peaks or a
+# cProfile dump) are captured automatically and written as JSON or
+# Prometheus text.
+#
+# Memory comes from ru_maxrss, the process-lifetime RSS high-water mark:
+# peak_rss_mb is that mark when the stage ends (so it includes every
+# earlier stage), and peak_rss_growth_mb is how far the stage raised it.
+# A stage that stays below an earlier peak shows no growth; --trace-memory
+# gives each stage's own peak Python allocations. Without the resource
+# module (Windows) both RSS figures are None and left out of Prometheus.
+#
+# Stages may overlap when run from a StageScheduler (utils/scheduler.py):
+# CPU time, memory and tracemalloc peaks are process-wide, so overlapping
+# stages share them, and total_wall_seconds (the sum of stage times) can
+# exceed elapsed_seconds.
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class PipelineMetrics:
+    def __init__(self, trace_memory=False, profile_stage=None, profile_output=None, quiet=False):
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_output = profile_output or f"output/profile_{profile_stage}.prof"
+        self.quiet = quiet
+        self.stages = []
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._active = []     # names of running stages, oldest first
+        self._failed = None
+        self._traced = 0      # running stages that asked for tracemalloc
+
+    @property
+    def current_stage(self):
+        """
+        The stage that failed, else the most recently started running stage.
+        """
+        with self._lock:
+            return self._failed or (self._active[-1] if self._active else None)
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=None):
+        record = {'stage': name, 'rows_in': rows_in}
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        with self._lock:
+            self._active.append(name)
+            if self.trace_memory:
+                if not self._traced:
+                    tracemalloc.start()
+                self._traced += 1
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        peak_start = peak_rss_mb()
+        if profiler:
+            profiler.enable()
+        try:
+            if self.quiet:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    yield record
+            else:
+                yield record
+            record['status'] = 'ok'
+        except BaseException as e:
+            record['status'] = 'error'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 6)
+            with self._lock:
+                if self.trace_memory:
+                    record['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                    self._traced -= 1
+                    if not self._traced:
+                        tracemalloc.stop()
+                self._active.remove(name)
+                if record['status'] != 'ok' and self._failed is None:
+                    self._failed = name
+            peak_end = peak_rss_mb()
+            if peak_end is None:
+                record['peak_rss_mb'] = record['peak_rss_growth_mb'] = None
+            else:
+                record['peak_rss_mb'] = round(peak_end, 2)
+                record['peak_rss_growth_mb'] = round(peak_end - peak_start, 2)
+            rows = record['rows_in'] if record['rows_in'] is not None else record.get('rows_out')
+            if rows and record['wall_seconds'] > 0:
+                record['rows_per_sec'] = round(rows / record['wall_seconds'])
+            if profiler:
+                self._save_profile(profiler, record)
+            self.stages.append(record)
+
+    def _save_profile(self, profiler, record):
+        os.makedirs(os.path.dirname(self.profile_output) or '.', exist_ok=True)
+        profiler.dump_stats(self.profile_output)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+        with open(self.profile_output + '.txt', 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+        record['profile'] = self.profile_output
+
+    def to_dict(self):
+        peak = peak_rss_mb()
+        return {
+            'started_at': self.started_at,
+            'elapsed_seconds': round(time.time() - self.started_at, 6),
+            'total_wall_seconds': round(sum(s['wall_seconds'] for s in self.stages), 6),
+            'total_cpu_seconds': round(sum(s['cpu_seconds'] for s in self.stages), 6),
+            'peak_rss_mb': round(peak, 2) if peak is not None else None,
+            'stages': self.stages
+        }
+
+    def to_prometheus(self, prefix='sales_pipeline'):
+        lines = []
+        series = [
+            ('stage_wall_seconds', 'gauge', 'Wall-clock time spent in the stage', 'wall_seconds'),
+            ('stage_cpu_seconds', 'gauge', 'CPU time spent in the stage', 'cpu_seconds'),
+            ('stage_rows_in', 'gauge', 'Rows entering the stage', 'rows_in'),
+            ('stage_rows_out', 'gauge', 'Rows leaving the stage', 'rows_out'),
+            ('stage_bytes_read', 'gauge', 'Bytes read by the stage', 'bytes_read'),
+            ('stage_bytes_written', 'gauge', 'Bytes written by the stage', 'bytes_written'),
+            ('stage_peak_rss_megabytes', 'gauge', 'Process RSS high-water mark at the end of the stage', 'peak_rss_mb'),
+            ('stage_peak_rss_growth_megabytes', 'gauge', 'Rise of the process RSS high-water mark during the stage',
+             'peak_rss_growth_mb'),
+            ('stage_traced_peak_megabytes', 'gauge', 'Peak Python allocations during the stage', 'traced_peak_mb')
+        ]
+        for metric, kind, help_text, key in series:
+            samples = [s for s in self.stages if s.get(key) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for s in samples:
+                lines.append(f'{prefix}_{metric}{{stage="{s["stage"]}"}} {s[key]}')
+        lines.append(f"# TYPE {prefix}_stage_failed gauge")
+        for s in self.stages:
+            lines.append(f'{prefix}_stage_failed{{stage="{s["stage"]}"}} {int(s["status"] != "ok")}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_path):
+        """
+        Writes Prometheus text for .prom files, JSON otherwise.
+        """
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            if output_path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from utils.file_handler import sample_encodings, iter_sales_data_range
+from utils.data_processor import SUMMARY_KEYS, iter_transactions, iter_valid_transactions, get_filter_options
+from utils.records import Transaction
+
+# ==========================================
+#       PARALLEL PARSING & VALIDATION
+# ==========================================
+# The input is split into byte ranges that start and end on line boundaries.
+# Each worker decodes, parses and validates its own range; partial results
+# are merged in shard order, so output is identical to the serial path.
+
+def process_pool(max_workers, **kwargs):
+    """
+    ProcessPoolExecutor that never forks while other threads run (the
+    catalog fetch, a background revalidation): the child could inherit a
+    lock one of them holds and hang. Fork is kept when the main thread is
+    alone, since workers then inherit the parent's data instead of having
+    it pickled; otherwise forkserver (spawn where it is unavailable).
+    """
+    context = multiprocessing.get_context()
+    if context.get_start_method() == 'fork' and threading.active_count() > 1:
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, **kwargs)
+
+def shard_file(filename, n_shards):
+    """
+    Returns (start, end) byte ranges covering everything after the header line.
+    Every range begins at the start of a line.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        f.readline()  # Skip header
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, n_shards):
+            pos = data_start + (size - data_start) * i // n_shards
+            if pos <= bounds[-1]:
+                continue
+            # Step back one byte so a range already on a line start stays there
+            f.seek(pos - 1)
+            f.readline()
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def _shard_filter_options(args):
+    filename, encoding, start, end = args
+    return get_filter_options(iter_transactions(iter_sales_data_range(filename, encoding, start, end)))
+
+def _shard_validate(args):
+    filename, encoding, start, end, region, min_amount, max_amount = args
+    summary = {}
+    valid = iter_valid_transactions(
+        iter_transactions(iter_sales_data_range(filename, encoding, start, end)),
+        region=region, min_amount=min_amount, max_amount=max_amount, summary=summary
+    )
+    # Ship columns rather than record objects: far cheaper to pickle and unpickle
+    columns = list(zip(*(t.values_tuple() for t in valid)))
+    return columns, summary
+
+def _prepare(filename, workers):
+    if not os.path.exists(filename):
+        print(f"Error: The file '{filename}' was not found.")
+        return [], []
+    encodings = sample_encodings(filename)
+    if not encodings:
+        print("Error: Could not read the file.")
+        return [], []
+    return encodings, shard_file(filename, workers)
+
+def _map_shards(func, filename, encodings, shards, workers, *options):
+    """
+    Runs func over every shard with the first sampled encoding, in shard
+    order. A decode error further into the file reruns all shards with the
+    next candidate.
+    """
+    with process_pool(workers) as pool:
+        for encoding in encodings:
+            try:
+                return list(pool.map(func, [(filename, encoding, s, e, *options) for s, e in shards]))
+            except UnicodeDecodeError:
+                continue
+    print("Error: Could not read the file.")
+    return []
+
+def parallel_filter_options(filename, workers=None):
+    """
+    Parallel version of get_filter_options(iter_transactions(iter_sales_data(filename))).
+    """
+    workers = workers or os.cpu_count()
+    encodings, shards = _prepare(filename, workers)
+    merged = {'regions': [], 'count': 0, 'min_amount': 0, 'max_amount': 0}
+    if not shards:
+        return merged
+
+    parts = _map_shards(_shard_filter_options, filename, encodings, shards, workers)
+    parts = [p for p in parts if p['count']]
+    if parts:
+        merged['regions'] = sorted(set().union(*(p['regions'] for p in parts)))
+        merged['count'] = sum(p['count'] for p in parts)
+        merged['min_amount'] = min(p['min_amount'] for p in parts)
+        merged['max_amount'] = max(p['max_amount'] for p in parts)
+    return merged
+
+def parallel_validate_and_filter(filename, region=None, min_amount=None, max_amount=None, workers=None):
+    """
+    Reads, parses, validates and filters `filename` across a process pool.
+    Returns the same (valid_list, invalid_count, summary) as validate_and_filter.
+    """
+    workers = workers or os.cpu_count()
+    encodings, shards = _prepare(filename, workers)
+    valid_data = []
+    summary = dict.fromkeys(SUMMARY_KEYS, 0)
+    if not shards:
+        return valid_data, 0, summary
+
+    # Results come back in shard order, so the merge is deterministic
+    for columns, part in _map_shards(_shard_validate, filename, encodings, shards, workers,
+                                     region, min_amount, max_amount):
+        if columns:
+            valid_data.extend(map(Transaction, *columns))
+        for key in SUMMARY_KEYS:
+            summary[key] += part[key]
+    return valid_data, summary['invalid'], summary
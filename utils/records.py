@@ -0,0 +1,124 @@
+from collections.abc import Mapping
+
+# ==========================================
+#          COMPACT TRANSACTION RECORDS
+# ==========================================
+# Rows are __slots__ objects instead of 8/12-key dicts. They behave as
+# read-only mappings (t['Quantity'], t.get('API_Match'), dict(t)), so every
+# function written against dict rows keeps working unchanged.
+
+FIELDS = ('TransactionID', 'Date', 'ProductID', 'ProductName',
+          'Quantity', 'UnitPrice', 'CustomerID', 'Region')
+API_FIELDS = ('API_Category', 'API_Brand', 'API_Rating', 'API_Match')
+
+_FIELD_SET = frozenset(FIELDS)
+_ENRICHED_FIELD_SET = frozenset(FIELDS + API_FIELDS)
+
+class Transaction(Mapping):
+    """
+    One parsed sales row.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, TransactionID, Date, ProductID, ProductName,
+                 Quantity, UnitPrice, CustomerID, Region):
+        self.TransactionID = TransactionID
+        self.Date = Date
+        self.ProductID = ProductID
+        self.ProductName = ProductName
+        self.Quantity = Quantity
+        self.UnitPrice = UnitPrice
+        self.CustomerID = CustomerID
+        self.Region = Region
+
+    @classmethod
+    def from_mapping(cls, row):
+        if isinstance(row, Transaction):
+            return cls(*row.values_tuple())
+        return cls(*[row[f] for f in FIELDS])
+
+    def values_tuple(self):
+        return (self.TransactionID, self.Date, self.ProductID, self.ProductName,
+                self.Quantity, self.UnitPrice, self.CustomerID, self.Region)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    # Overridden so membership tests and .get() never raise internally
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __reduce__(self):
+        return (Transaction, self.values_tuple())
+
+    def __repr__(self):
+        return f"Transaction({dict(self)!r})"
+
+class EnrichedTransaction(Transaction):
+    """
+    A Transaction plus a reference to its product's entry in the shared
+    product mapping (the side table). API_* values are read from that entry
+    rather than copied onto every row.
+    """
+    __slots__ = ('product_info',)
+
+    def __init__(self, TransactionID, Date, ProductID, ProductName,
+                 Quantity, UnitPrice, CustomerID, Region, product_info=None):
+        self.TransactionID = TransactionID
+        self.Date = Date
+        self.ProductID = ProductID
+        self.ProductName = ProductName
+        self.Quantity = Quantity
+        self.UnitPrice = UnitPrice
+        self.CustomerID = CustomerID
+        self.Region = Region
+        self.product_info = product_info
+
+    @classmethod
+    def from_mapping(cls, row, product_info=None):
+        if isinstance(row, Transaction):
+            return cls(*row.values_tuple(), product_info)
+        return cls(*[row[f] for f in FIELDS], product_info)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        info = self.product_info
+        if key == 'API_Match':
+            return info is not None
+        if key == 'API_Category':
+            return info['category'] if info is not None else None
+        if key == 'API_Brand':
+            return info['brand'] if info is not None else None
+        if key == 'API_Rating':
+            return info['rating'] if info is not None else None
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in _ENRICHED_FIELD_SET
+
+    def get(self, key, default=None):
+        return self[key] if key in _ENRICHED_FIELD_SET else default
+
+    def __iter__(self):
+        return iter(FIELDS + API_FIELDS)
+
+    def __len__(self):
+        return len(FIELDS) + len(API_FIELDS)
+
+    def __reduce__(self):
+        return (EnrichedTransaction, self.values_tuple() + (self.product_info,))
+
+    def __repr__(self):
+        return f"EnrichedTransaction({dict(self)!r})"
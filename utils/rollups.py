@@ -0,0 +1,221 @@
+import datetime
+from utils.sketches import HyperLogLog, stable_hash
+
+# ==========================================
+#          DATE ROLLUPS
+# ==========================================
+# Per-day buckets are filled in one pass; week (ISO, 'YYYY-Www'), month
+# ('YYYY-MM') and quarter ('YYYY-Qn') buckets are rolled up from the days,
+# so building them costs O(days), not O(rows). Every bucket holds revenue,
+# transaction count, its customers and a per-region [revenue, count]
+# breakdown. A date-range query is answered from the fewest whole buckets
+# that tile the range (quarters, then months, weeks and single days at the
+# edges), so it costs O(buckets) rather than O(rows).
+#
+# Customers are kept as exact sets, or as HyperLogLog sketches (constant
+# size per bucket, ±3.2%) with approximate=True.
+
+LEVELS = ('day', 'week', 'month', 'quarter')
+DAILY_PRECISION = 10
+
+def _parse_day(date):
+    try:
+        return datetime.date.fromisoformat(date)
+    except (TypeError, ValueError):
+        return None
+
+def _bucket_keys(day):
+    iso_year, iso_week, _ = day.isocalendar()
+    return {
+        'week': f"{iso_year}-W{iso_week:02d}",
+        'month': f"{day.year}-{day.month:02d}",
+        'quarter': f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+    }
+
+def _month_end(day):
+    next_month = day.replace(day=28) + datetime.timedelta(days=4)
+    return next_month - datetime.timedelta(days=next_month.day)
+
+def _quarter_end(day):
+    return _month_end(day.replace(month=(day.month - 1) // 3 * 3 + 3, day=1))
+
+class DateRollups:
+    def __init__(self, transactions=None, approximate=False):
+        self.approximate = approximate
+        self.days = {}  # date -> [revenue, count, customers, {region: [revenue, count]}]
+        self._levels = None
+        self._span = None  # (first, last) parseable day, set with the levels
+        if transactions is not None:
+            self.update(transactions)
+
+    def _new_customers(self):
+        return HyperLogLog(DAILY_PRECISION) if self.approximate else set()
+
+    def update(self, transactions):
+        for t in transactions:
+            self.add(t)
+        return self
+
+    def add(self, t):
+        sale = t['Quantity'] * t['UnitPrice']
+        date = t['Date']
+        bucket = self.days.get(date)
+        if bucket is None:
+            bucket = self.days[date] = [0.0, 0, self._new_customers(), {}]
+        bucket[0] += sale
+        bucket[1] += 1
+        if self.approximate:
+            bucket[2].add_hash(stable_hash(t['CustomerID']))
+        else:
+            bucket[2].add(t['CustomerID'])
+        stats = bucket[3].get(t['Region'])
+        if stats is None:
+            stats = bucket[3][t['Region']] = [0.0, 0]
+        stats[0] += sale
+        stats[1] += 1
+        self._levels = None
+
+    def merge(self, other):
+        """
+        Folds another DateRollups (same `approximate` setting) into this one.
+        """
+        for date, bucket in other.days.items():
+            self._fold(self.days, date, bucket)
+        self._levels = None
+        return self
+
+    def _fold(self, table, key, bucket):
+        target = table.get(key)
+        if target is None:
+            target = table[key] = [0.0, 0, self._new_customers(), {}]
+        target[0] += bucket[0]
+        target[1] += bucket[1]
+        if self.approximate:
+            target[2].merge(bucket[2])
+        else:
+            target[2].update(bucket[2])
+        for region, (revenue, count) in bucket[3].items():
+            stats = target[3].get(region)
+            if stats is None:
+                stats = target[3][region] = [0.0, 0]
+            stats[0] += revenue
+            stats[1] += count
+
+    @property
+    def levels(self):
+        """
+        {level: {bucket key: bucket}} for week, month and quarter, rolled up
+        from the days on first use after a change.
+        """
+        if self._levels is None:
+            levels = {'week': {}, 'month': {}, 'quarter': {}}
+            dated = []
+            for date in sorted(self.days):
+                day = _parse_day(date)
+                if day is None:
+                    continue  # unparseable dates only appear at day level
+                dated.append(day)
+                for level, key in _bucket_keys(day).items():
+                    self._fold(levels[level], key, self.days[date])
+            self._levels = levels
+            self._span = (dated[0], dated[-1]) if dated else None
+        return self._levels
+
+    def _summary(self, bucket):
+        revenue, count, customers, regions = bucket
+        return {
+            'revenue': revenue,
+            'transaction_count': count,
+            'unique_customers': round(customers.count()) if self.approximate else len(customers),
+            'regions': {r: {'revenue': v[0], 'transaction_count': v[1]}
+                        for r, v in sorted(regions.items(), key=lambda item: item[1][0], reverse=True)}
+        }
+
+    def buckets(self, level='month'):
+        """
+        {bucket key: summary} for one level, in date order.
+        """
+        table = self.days if level == 'day' else self.levels[level]
+        return {key: self._summary(table[key]) for key in sorted(table)}
+
+    def _tiles(self, start, end):
+        """
+        (level, key) of the fewest whole buckets covering start..end.
+        """
+        tiles = []
+        day = start
+        while day <= end:
+            keys = _bucket_keys(day)
+            week_end = day + datetime.timedelta(days=6)
+            if day.day == 1 and day.month % 3 == 1 and _quarter_end(day) <= end:
+                tiles.append(('quarter', keys['quarter']))
+                day = _quarter_end(day)
+            elif day.day == 1 and _month_end(day) <= end:
+                tiles.append(('month', keys['month']))
+                day = _month_end(day)
+            elif day.weekday() == 0 and week_end <= end and week_end.month == day.month:
+                # Weeks crossing a month boundary would stop months lining up
+                tiles.append(('week', keys['week']))
+                day = week_end
+            else:
+                tiles.append(('day', day.isoformat()))
+            day += datetime.timedelta(days=1)
+        return tiles
+
+    def query(self, start_date=None, end_date=None):
+        """
+        Revenue, transaction count, unique customers and per-region breakdown
+        for start_date <= Date <= end_date ('YYYY-MM-DD', inclusive; either
+        end may be omitted). Unparseable dates are never included.
+        """
+        bounds = {}
+        for name, date in (('start_date', start_date), ('end_date', end_date)):
+            if date is not None:
+                bounds[name] = _parse_day(date)
+                if bounds[name] is None:
+                    raise ValueError(f"Invalid {name}: {date!r} (expected YYYY-MM-DD)")
+        levels = self.levels
+        total = [0.0, 0, self._new_customers(), {}]
+        if self._span:
+            first, last = self._span
+            start = max(bounds.get('start_date', first), first)
+            end = min(bounds.get('end_date', last), last)
+            for level, key in self._tiles(start, end):
+                table = self.days if level == 'day' else levels[level]
+                if key in table:
+                    self._fold({'total': total}, 'total', table[key])
+        return self._summary(total)
+
+    def moving_revenue(self, window=7):
+        """
+        {date: revenue over the `window` calendar days ending that date} for
+        every day from the first to the last dated bucket (days without
+        sales count as zero). One running sum: each day is added once and
+        dropped once.
+        """
+        revenue = {}
+        for date, bucket in self.days.items():
+            day = _parse_day(date)
+            if day is not None:
+                revenue[day] = bucket[0]
+        if not revenue:
+            return {}
+        result = {}
+        running = 0.0
+        day, last = min(revenue), max(revenue)
+        one_day = datetime.timedelta(days=1)
+        span = datetime.timedelta(days=window)
+        while day <= last:
+            running += revenue.get(day, 0.0)
+            running -= revenue.get(day - span, 0.0)
+            result[day.isoformat()] = running
+            day += one_day
+        return result
+
+    def to_dict(self, windows=(7, 30)):
+        """
+        Every level plus the moving-revenue series, ready for json.dump.
+        """
+        result = {level: self.buckets(level) for level in LEVELS}
+        result['moving_revenue'] = {str(w): self.moving_revenue(w) for w in windows}
+        return result
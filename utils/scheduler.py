@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# ==========================================
+#          STAGE SCHEDULER
+# ==========================================
+# Runs pipeline stages on background threads as soon as the stages they
+# depend on have finished, so I/O-bound work (the catalog fetch, writing
+# output files) overlaps with the parsing and reporting done in the main
+# thread. The caller joins a stage only where it needs the result:
+#
+#     with StageScheduler(metrics) as scheduler:
+#         scheduler.submit('fetch_all_products', get_product_mapping)
+#         ... read, parse, validate ...
+#         product_map = scheduler.result('fetch_all_products')
+#
+# Stages are started in submission order and may only depend on stages
+# submitted before them, so a stage never waits on one queued behind it.
+
+class StageScheduler:
+    def __init__(self, metrics=None, max_workers=4):
+        self.metrics = metrics
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stage')
+        self._stages = {}  # name -> future
+
+    def submit(self, name, func, *args, after=(), rows_in=None, measure=None, **kwargs):
+        """
+        Schedules func(*args, **kwargs) as stage `name` once every stage named
+        in `after` has finished (a failed dependency fails this stage too).
+        `measure(record, result)` may fill the stage's metrics record.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' was already submitted")
+        missing = [dep for dep in after if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        dependencies = [self._stages[dep] for dep in after]
+
+        def run():
+            for future in dependencies:
+                future.result()
+            if self.metrics is None:
+                return func(*args, **kwargs)
+            with self.metrics.stage(name, rows_in=rows_in) as stage_record:
+                result = func(*args, **kwargs)
+                if measure is not None:
+                    measure(stage_record, result)
+            return result
+
+        self._stages[name] = self._pool.submit(run)
+
+    def result(self, name):
+        """
+        Waits for stage `name` and returns its result (re-raising its error).
+        """
+        return self._stages[name].result()
+
+    def join(self):
+        """
+        Waits for every submitted stage; re-raises the first error in submission order.
+        """
+        for future in list(self._stages.values()):
+            future.result()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
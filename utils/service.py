@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from utils.batch import load_validated
+from utils.aggregator import SalesAccumulator, merge_accumulators
+from utils.index import TransactionIndex
+
+# ==========================================
+#          HTTP ANALYTICS SERVICE
+# ==========================================
+# Loads and validates the input once, indexes it and keeps the unfiltered
+# aggregates warm in memory. Every GET endpoint returns JSON and accepts the
+# filters region, min_amount, max_amount, start_date, end_date, customer_id
+# and product_id; a filtered request is an index lookup plus one aggregation
+# pass over the matching rows, and its response is kept in an LRU cache.
+# POST /ingest {"path": "..."} appends a file's valid rows, swaps in a new
+# snapshot and drops every cached response. As with SalesStore.load, a file
+# ingested again unchanged (same path, size and mtime) is skipped, and a
+# changed one replaces its earlier rows.
+#
+#   GET  /health  /summary  /regions  /products/top?n=5
+#        /products/low?threshold=10  /customers?limit=10  /daily  /peak
+#   GET  /cache   (hit / miss counters)
+#   POST /ingest
+
+FILTERS = {
+    'region': str, 'min_amount': float, 'max_amount': float,
+    'start_date': str, 'end_date': str, 'customer_id': str, 'product_id': str
+}
+CACHE_SIZE = 256
+
+class LRUCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+def _source_key(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), (stat.st_size, stat.st_mtime_ns)
+
+class _Snapshot:
+    """
+    Immutable view served to requests; ingest builds a new one and swaps it in.
+    `stats` are the unfiltered aggregates of `rows`, computed here if not given.
+    `sources` maps each loaded file's absolute path to its (size, mtime_ns).
+    """
+
+    def __init__(self, generation, rows, summary, sources, stats=None):
+        self.generation = generation
+        self.rows = rows
+        self.summary = summary
+        self.sources = sources
+        self.index = TransactionIndex(rows)
+        self.stats = stats if stats is not None else SalesAccumulator.from_transactions(rows)
+
+class AnalyticsService:
+    def __init__(self, paths=(), workers=1, cache_size=CACHE_SIZE):
+        self.workers = workers
+        self.cache = LRUCache(cache_size)
+        self._ingest_lock = threading.Lock()
+        rows, summary = load_validated(list(paths), workers=workers)
+        sources = dict(_source_key(path) for path in paths if os.path.isfile(path))
+        self.snapshot = _Snapshot(0, rows, summary, sources)
+
+    def ingest(self, paths):
+        """
+        Appends the valid rows of `paths`, then invalidates the cache.
+        Files already loaded and unchanged are skipped; if one changed, every
+        source is reloaded so its old rows are dropped. Requests keep being
+        answered from the previous snapshot meanwhile.
+        """
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            raise FileNotFoundError(f"File(s) not found: {', '.join(missing)}")
+        with self._ingest_lock:
+            old = self.snapshot
+            sources = dict(old.sources)
+            new, replaced, skipped = [], [], []
+            for path in paths:
+                key, version = _source_key(path)
+                if sources.get(key) == version:
+                    skipped.append(path)
+                    continue
+                (replaced if key in sources else new).append(path)
+                sources[key] = version
+
+            if replaced:
+                # The aggregates can't drop the old rows: rebuild from every source
+                rows, summary = load_validated(list(sources), workers=self.workers)
+                self.snapshot = _Snapshot(old.generation + 1, rows, summary, sources)
+                self.cache.clear()
+            elif new:
+                rows, summary = load_validated(new, workers=self.workers)
+                merged = {key: old.summary.get(key, 0) + summary[key] for key in summary}
+                # Only the new rows are aggregated, into a copy of the old aggregates;
+                # the index is rebuilt over all rows
+                stats = merge_accumulators([old.stats, SalesAccumulator.from_transactions(rows)])
+                self.snapshot = _Snapshot(old.generation + 1, old.rows + rows, merged, sources, stats)
+                self.cache.clear()
+            current = self.snapshot
+        return {'added': len(current.rows) - len(old.rows),
+                'invalid': current.summary.get('invalid', 0) - old.summary.get('invalid', 0),
+                'skipped': skipped, 'replaced': replaced,
+                'total': len(current.rows), 'generation': current.generation}
+
+    def _stats(self, snapshot, filters):
+        if not filters:
+            return snapshot.stats
+        return SalesAccumulator.from_transactions(snapshot.index.query(**filters))
+
+    def handle(self, endpoint, params):
+        """
+        Returns (status, JSON bytes) for one GET request.
+        """
+        snapshot = self.snapshot
+        if endpoint == '/health':
+            return 200, _json({'status': 'ok', 'transactions': len(snapshot.rows), 'generation': snapshot.generation})
+        if endpoint == '/cache':
+            return 200, _json(self.cache.info())
+        view = VIEWS.get(endpoint)
+        if view is None:
+            return 404, _json({'error': f"Unknown endpoint: {endpoint}"})
+        try:
+            filters = {key: FILTERS[key](value) for key, value in params.items() if key in FILTERS}
+            options = {key: int(value) for key, value in params.items() if key in view[1]}
+        except ValueError as e:
+            return 400, _json({'error': f"Invalid parameter: {e}"})
+
+        # The generation keeps a response computed during an ingest from outliving it
+        key = (snapshot.generation, endpoint, tuple(sorted(filters.items())), tuple(sorted(options.items())))
+        payload = self.cache.get(key)
+        if payload is None:
+            payload = _json(view[0](self._stats(snapshot, filters), **options))
+            self.cache.put(key, payload)
+        return 200, payload
+
+def _json(body):
+    return json.dumps(body).encode('utf-8')
+
+def _summary(stats):
+    return {
+        'total_revenue': stats.total_revenue,
+        'transaction_count': stats.transaction_count,
+        'average_order_value': stats.total_revenue / stats.transaction_count if stats.transaction_count else 0,
+        'date_range': [stats.min_date, stats.max_date]
+    }
+
+def _top_products(stats, n=5):
+    return [{'product': name, 'quantity': qty, 'revenue': rev} for name, qty, rev in stats.top_selling_products(n)]
+
+def _low_products(stats, threshold=10):
+    return [{'product': name, 'quantity': qty, 'revenue': rev}
+            for name, qty, rev in stats.low_performing_products(threshold)]
+
+def _customers(stats, limit=10):
+    return dict(list(stats.customer_analysis().items())[:limit])
+
+def _peak(stats):
+    peak = stats.find_peak_sales_day()
+    return {'date': peak[0], 'revenue': peak[1], 'transaction_count': peak[2]} if peak else None
+
+# endpoint -> (view, integer options it accepts)
+VIEWS = {
+    '/summary': (_summary, ()),
+    '/regions': (lambda stats: stats.region_wise_sales(), ()),
+    '/products/top': (_top_products, ('n',)),
+    '/products/low': (_low_products, ('threshold',)),
+    '/customers': (_customers, ('limit',)),
+    '/daily': (lambda stats: stats.daily_sales_trend(), ()),
+    '/peak': (_peak, ())
+}
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+
+    def _send(self, status, payload):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        start = time.perf_counter()
+        status, body = self.service.handle(url.path.rstrip('/') or '/', params)
+        self._send(status, body)
+        self.log_message('"%s" %s %.2fms', self.requestline, status, (time.perf_counter() - start) * 1000)
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/') != '/ingest':
+            return self._send(404, _json({'error': f"Unknown endpoint: {self.path}"}))
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            paths = request.get('paths') or [request['path']]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return self._send(400, _json({'error': 'Expected a JSON body like {"path": "data/new_sales.txt"}'}))
+        try:
+            result = self.service.ingest(paths)
+        except FileNotFoundError as e:
+            return self._send(400, _json({'error': str(e)}))
+        self._send(200, _json(result))
+
+    def log_request(self, code='-', size='-'):
+        pass  # do_GET logs with its latency instead
+
+def serve(service, host='127.0.0.1', port=8050):
+    """
+    Serves `service` until interrupted, one thread per request.
+    """
+    handler = type('Handler', (_Handler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"   ✓ Serving {len(service.snapshot.rows)} transactions on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,266 @@
+import hashlib
+import heapq
+import math
+
+# ==========================================
+#          STREAMING SKETCHES
+# ==========================================
+# Fixed-size summaries for the approximate analytics mode. Every sketch can
+# be merged with another of the same configuration and round-trips through
+# to_state() / from_state() as plain JSON.
+#
+# Error bounds:
+#   HyperLogLog     relative standard error 1.04 / sqrt(2**precision)
+#                   (precision 12: ~1.6%, precision 10: ~3.3%)
+#   SpaceSaving     an item's weight is overestimated by at most its `error`,
+#                   itself at most total weight / capacity; any item heavier
+#                   than total / capacity is guaranteed to be tracked
+#   TDigest         quantile error shrinks towards the tails, roughly
+#                   q * (1 - q) / compression in rank
+
+def stable_hash(value):
+    """
+    64-bit hash that is identical across processes (unlike hash() on str),
+    so sketches built in different runs can be merged.
+    """
+    return int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+
+class HyperLogLog:
+    """
+    Distinct counter in 2**precision bytes.
+    """
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add_hash(self, h):
+        p = self.precision
+        index = h >> (64 - p)
+        rest = h & ((1 << (64 - p)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits
+        rank = (64 - p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(stable_hash(value))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def to_state(self):
+        return {'precision': self.precision, 'registers': self.registers.hex()}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['precision'])
+        sketch.registers = bytearray.fromhex(state['registers'])
+        return sketch
+
+class SpaceSaving:
+    """
+    Weighted heavy hitters (Space-Saving) over at most `capacity` keys.
+    Each tracked key keeps [weight, error, count, extra], where `extra` is a
+    secondary sum (e.g. revenue next to quantity) carried along with it.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.items = {}   # key -> [weight, error, count, extra]
+        self.total = 0
+        # One (weight, key) entry per tracked key. Weights only grow, so an
+        # entry is a lower bound and is refreshed lazily when it surfaces.
+        self._heap = []
+
+    def add(self, key, weight=1, extra=0.0):
+        self.total += weight
+        item = self.items.get(key)
+        if item is None:
+            error = 0
+            if len(self.items) >= self.capacity:
+                # Replace the lightest key; the newcomer inherits its weight as error
+                error = self._pop_min()
+            item = self.items[key] = [error + weight, error, 1, extra]
+            heapq.heappush(self._heap, (item[0], key))
+        else:
+            item[0] += weight
+            item[2] += 1
+            item[3] += extra
+
+    def _pop_min(self):
+        heap = self._heap
+        while True:
+            weight, key = heap[0]
+            current = self.items[key][0]
+            if current == weight:
+                heapq.heappop(heap)
+                del self.items[key]
+                return weight
+            heapq.heapreplace(heap, (current, key))
+
+    @property
+    def min_weight(self):
+        if len(self.items) < self.capacity:
+            return 0
+        return min(v[0] for v in self.items.values())
+
+    def top(self, n=None, key=None):
+        """
+        [(key, weight, error, count, extra)] heaviest first.
+        """
+        entries = [(k, *v) for k, v in self.items.items()]
+        entries.sort(key=key or (lambda e: e[1]), reverse=True)
+        return entries if n is None else entries[:n]
+
+    def merge(self, other):
+        """
+        Mergeable-summaries rule: a key missing from a full summary may have
+        had up to that summary's minimum weight, which is added to its weight
+        and error; then only the `capacity` heaviest keys are kept.
+        """
+        self_min, other_min = self.min_weight, other.min_weight
+        merged = {}
+        for key in self.items.keys() | other.items.keys():
+            a = self.items.get(key)
+            b = other.items.get(key)
+            a = a if a is not None else [self_min, self_min, 0, 0.0]
+            b = b if b is not None else [other_min, other_min, 0, 0.0]
+            merged[key] = [a[0] + b[0], a[1] + b[1], a[2] + b[2], a[3] + b[3]]
+        keep = sorted(merged.items(), key=lambda kv: kv[1][0], reverse=True)[:self.capacity]
+        self.items = dict(keep)
+        self.total += other.total
+        self._heap = [(v[0], k) for k, v in self.items.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def to_state(self):
+        return {'capacity': self.capacity, 'total': self.total,
+                'items': [[k, *v] for k, v in self.items.items()]}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['capacity'])
+        sketch.total = state['total']
+        sketch.items = {k: [w, e, c, x] for k, w, e, c, x in state['items']}
+        sketch._heap = [(v[0], k) for k, v in sketch.items.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+class TDigest:
+    """
+    Merging t-digest for quantiles of a stream of numbers.
+    Centroids are compressed so that each holds at most about
+    4 * n * q * (1 - q) / compression points, keeping the tails precise.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # [mean, weight], sorted by mean
+        self.min = None
+        self.max = None
+        self._weight = 0     # total weight of the centroids
+        self._buffer = []    # unit-weight values not compressed yet
+
+    @property
+    def count(self):
+        return self._weight + len(self._buffer)
+
+    def add(self, value):
+        self._buffer.append(value)
+        if len(self._buffer) >= 50 * self.compression:
+            self.compress()
+
+    def compress(self):
+        buffer = self._buffer
+        if not buffer and len(self.centroids) <= 2 * self.compression:
+            return
+        if buffer:
+            low, high = min(buffer), max(buffer)
+            if self.min is None or low < self.min: self.min = low
+            if self.max is None or high > self.max: self.max = high
+        points = sorted(self.centroids + [[v, 1] for v in buffer], key=lambda c: c[0])
+        self._buffer = []
+        total = self._weight = self._weight + len(buffer)
+        merged = []
+        cumulative = 0
+        current = None
+        for mean, weight in points:
+            if current is None:
+                current = [mean, weight]
+                continue
+            q = (cumulative + current[1] + weight / 2) / total
+            limit = max(1, 4 * total * q * (1 - q) / self.compression)
+            if current[1] + weight <= limit:
+                new_weight = current[1] + weight
+                current[0] += (mean - current[0]) * weight / new_weight
+                current[1] = new_weight
+            else:
+                cumulative += current[1]
+                merged.append(current)
+                current = [mean, weight]
+        if current is not None:
+            merged.append(current)
+        self.centroids = merged
+
+    def quantile(self, q):
+        self.compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        cumulative = 0
+        previous_mean, previous_mid = self.min, 0
+        for mean, weight in self.centroids:
+            mid = cumulative + weight / 2
+            if target < mid:
+                # Interpolate between neighbouring centroid centres
+                span = mid - previous_mid
+                fraction = (target - previous_mid) / span if span else 0
+                return previous_mean + (mean - previous_mean) * fraction
+            cumulative += weight
+            previous_mean, previous_mid = mean, mid
+        span = self.count - previous_mid
+        fraction = (target - previous_mid) / span if span else 0
+        return previous_mean + (self.max - previous_mean) * fraction
+
+    def merge(self, other):
+        self.compress()
+        other.compress()
+        self.centroids = sorted(self.centroids + [list(c) for c in other.centroids], key=lambda c: c[0])
+        self._weight += other._weight
+        for value in (other.min, other.max):
+            if value is None:
+                continue
+            if self.min is None or value < self.min: self.min = value
+            if self.max is None or value > self.max: self.max = value
+        self.compress()
+        return self
+
+    def to_state(self):
+        self.compress()
+        return {'compression': self.compression, 'count': self.count, 'min': self.min,
+                'max': self.max, 'centroids': self.centroids}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['compression'])
+        sketch.min = state['min']
+        sketch.max = state['max']
+        sketch.centroids = [list(c) for c in state['centroids']]
+        sketch._weight = state['count']
+        return sketch
@@ -0,0 +1,289 @@
+import os
+import sqlite3
+import time
+from itertools import islice
+from utils.data_processor import product_numeric_id
+
+# ==========================================
+#          SQLITE STORAGE BACKEND
+# ==========================================
+# Validated transactions are bulk-loaded (executemany in batches, one
+# transaction per input file) into a local SQLite file that keeps growing
+# across runs. Each input file is a "source": loading an unchanged source
+# again is a no-op, and a changed one replaces its earlier rows, so
+# re-running never double counts and an interrupted load leaves no trace.
+# Report figures come from indexed SQL aggregates (SQLiteStats), so a report
+# over the whole history never loads the rows into memory. Ties are broken
+# by load order (the row id), matching the first-seen order of the Python
+# aggregates.
+
+LOAD_BATCH_SIZE = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    loaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    TransactionID TEXT NOT NULL,
+    Date TEXT NOT NULL,
+    ProductID TEXT NOT NULL,
+    ProductName TEXT NOT NULL,
+    Quantity INTEGER NOT NULL,
+    UnitPrice REAL NOT NULL,
+    CustomerID TEXT NOT NULL,
+    Region TEXT NOT NULL,
+    Amount REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source_amounts (
+    source_id INTEGER PRIMARY KEY REFERENCES sources(id),
+    min_amount REAL,
+    max_amount REAL
+);
+CREATE TABLE IF NOT EXISTS source_regions (
+    source_id INTEGER NOT NULL REFERENCES sources(id),
+    Region TEXT NOT NULL
+);
+"""
+
+INDEXES = {
+    'idx_transactions_date': 'Date',
+    'idx_transactions_region': 'Region',
+    'idx_transactions_customer': 'CustomerID',
+    'idx_transactions_product': 'ProductID',
+    'idx_transactions_source': 'source_id'
+}
+
+class SalesStore:
+    def __init__(self, path='output/sales.db'):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._create_indexes()
+
+    def _create_indexes(self):
+        for name, column in INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON transactions({column})")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def load(self, source, transactions, options=None):
+        """
+        Stores validated transactions read from the file `source`. Returns the
+        number of rows loaded, or None when the source is unchanged since it
+        was last loaded. `options` is read once `transactions` is consumed:
+        get_filter_options() over every parsed row of the source, invalid
+        ones included, kept for filter_options().
+        """
+        path = os.path.abspath(source)
+        stat = os.stat(source)
+        conn = self.conn
+        row = conn.execute("SELECT id, size, mtime_ns FROM sources WHERE path = ?", (path,)).fetchone()
+        if row is not None and (row[1], row[2]) == (stat.st_size, stat.st_mtime_ns):
+            return None
+
+        # One transaction for the whole load: a load that stops partway rolls
+        # back completely, so a source is only ever registered with all of
+        # its rows, and a changed file keeps its old rows until the new ones
+        # are in
+        count = 0
+        with conn:
+            conn.execute("BEGIN")
+            if row is not None:
+                for table in ('transactions', 'source_amounts', 'source_regions'):
+                    conn.execute(f"DELETE FROM {table} WHERE source_id = ?", (row[0],))
+                conn.execute("DELETE FROM sources WHERE id = ?", (row[0],))
+            source_id = conn.execute(
+                "INSERT INTO sources (path, size, mtime_ns, row_count, loaded_at) VALUES (?, ?, ?, 0, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, time.time())
+            ).lastrowid
+            # Building the indexes once after a bulk load into an empty table
+            # is much cheaper than updating them row by row
+            empty = conn.execute("SELECT NOT EXISTS (SELECT 1 FROM transactions)").fetchone()[0]
+            if empty:
+                for name in INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+            rows = ((source_id, *t.values_tuple(), t['Quantity'] * t['UnitPrice'])
+                    if hasattr(t, 'values_tuple') else
+                    (source_id, t['TransactionID'], t['Date'], t['ProductID'], t['ProductName'],
+                     t['Quantity'], t['UnitPrice'], t['CustomerID'], t['Region'], t['Quantity'] * t['UnitPrice'])
+                    for t in transactions)
+            while True:
+                batch = list(islice(rows, LOAD_BATCH_SIZE))
+                if not batch:
+                    break
+                conn.executemany(
+                    "INSERT INTO transactions (source_id, TransactionID, Date, ProductID, ProductName, "
+                    "Quantity, UnitPrice, CustomerID, Region, Amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch
+                )
+                count += len(batch)
+
+            conn.execute("UPDATE sources SET row_count = ? WHERE id = ?", (count, source_id))
+            if options and options['count']:
+                conn.execute("INSERT INTO source_amounts (source_id, min_amount, max_amount) VALUES (?, ?, ?)",
+                             (source_id, options['min_amount'], options['max_amount']))
+                conn.executemany("INSERT INTO source_regions (source_id, Region) VALUES (?, ?)",
+                                 [(source_id, region) for region in options['regions']])
+            self._create_indexes()
+        return count
+
+    def sources(self):
+        return [dict(zip(('path', 'size', 'mtime_ns', 'row_count', 'loaded_at'), row)) for row in
+                self.conn.execute("SELECT path, size, mtime_ns, row_count, loaded_at FROM sources ORDER BY id")]
+
+    def filter_options(self):
+        """
+        Same shape as get_filter_options(). Regions and the amount range
+        cover every parsed row of the loaded sources, invalid ones included,
+        as in the other modes; 'count' is the number of stored transactions.
+        Stored rows are a subset of the parsed ones, so taking them in too
+        changes nothing, except for sources loaded before the per-source
+        options were kept.
+        """
+        count, min_amount, max_amount = self.conn.execute(
+            "SELECT COUNT(*), MIN(Amount), MAX(Amount) FROM transactions").fetchone()
+        parsed_min, parsed_max = self.conn.execute(
+            "SELECT MIN(min_amount), MAX(max_amount) FROM source_amounts").fetchone()
+        if parsed_min is not None:
+            min_amount = parsed_min if min_amount is None else min(min_amount, parsed_min)
+            max_amount = parsed_max if max_amount is None else max(max_amount, parsed_max)
+        regions = [r for (r,) in self.conn.execute(
+            "SELECT Region FROM transactions WHERE Region != '' "
+            "UNION SELECT Region FROM source_regions WHERE Region != '' ORDER BY Region")]
+        return {'regions': regions, 'count': count,
+                'min_amount': min_amount or 0, 'max_amount': max_amount or 0}
+
+class SQLiteStats:
+    """
+    Report-facing view over a SalesStore, with the same attributes and
+    methods as SalesAccumulator. The region / amount filters are applied
+    in SQL exactly as iter_filtered_transactions applies them.
+    """
+
+    def __init__(self, store, region=None, min_amount=None, max_amount=None):
+        self.conn = store.conn
+        clauses, params = [], []
+        if region:
+            clauses.append("Region = ?")
+            params.append(region)
+        if min_amount is not None:
+            clauses.append("Amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            clauses.append("Amount <= ?")
+            params.append(max_amount)
+        self.where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        self.params = params
+
+        self.transaction_count, total, self.min_date, self.max_date = self._query(
+            "COUNT(*), TOTAL(Amount), MIN(Date), MAX(Date)").fetchone()
+        self.total_revenue = total if self.transaction_count else 0
+        self.enriched_count = 0
+        self.matched_count = 0
+        self.missing_products = {}
+
+    def _query(self, columns, tail="", extra=()):
+        """
+        SELECT `columns` over the filtered rows, followed by `tail` (GROUP BY ...).
+        """
+        return self.conn.execute(f"SELECT {columns} FROM transactions{self.where} {tail}",
+                                 (*self.params, *extra))
+
+    def enrich(self, product_mapping):
+        """
+        Match stats for the filtered rows, resolving each distinct ProductID
+        once (same figures as match_products over the rows).
+        """
+        unmatched = []
+        self.enriched_count = self.matched_count = 0
+        for p_id, count in self._query("ProductID, COUNT(*)", "GROUP BY ProductID"):
+            self.enriched_count += count
+            if product_mapping.get(product_numeric_id(p_id)) is None:
+                unmatched.append(p_id)
+            else:
+                self.matched_count += count
+        self.missing_products = {}
+        # Unmatched product names in first-seen order, a chunk of IDs at a time
+        first_seen = {}
+        for start in range(0, len(unmatched), 500):
+            chunk = unmatched[start:start + 500]
+            tail = (" AND " if self.where else " WHERE ") + f"ProductID IN ({', '.join('?' * len(chunk))})"
+            first_seen.update(self.conn.execute(
+                f"SELECT ProductName, MIN(id) FROM transactions{self.where}{tail} GROUP BY ProductName",
+                (*self.params, *chunk)))
+        for name in sorted(first_seen, key=first_seen.get):
+            self.missing_products[name] = None
+        return self
+
+    def add_enrichment_summary(self, summary):
+        self.enriched_count += summary['enriched']
+        self.matched_count += summary['matched']
+        self.missing_products.update(dict.fromkeys(summary['missing_products']))
+        return self
+
+    # --- Views (same output as the functions in data_processor) ---
+
+    def region_wise_sales(self):
+        total_revenue = self.total_revenue
+        stats = {}
+        for region, sales, count in self._query(
+                "Region, TOTAL(Amount), COUNT(*)", "GROUP BY Region ORDER BY TOTAL(Amount) DESC, MIN(id)"):
+            stats[region] = {
+                'total_sales': sales, 'transaction_count': count,
+                'percentage': round((sales / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
+            }
+        return stats
+
+    def top_selling_products(self, n=5):
+        rows = self._query("ProductName, SUM(Quantity) AS qty, TOTAL(Amount)",
+                           "GROUP BY ProductName ORDER BY qty DESC, MIN(id) LIMIT ?", (n,))
+        return [tuple(row) for row in rows]
+
+    def customer_analysis(self):
+        customer_stats = {}
+        for c_id, spent, count, products in self._query(
+                "CustomerID, TOTAL(Amount), COUNT(*), GROUP_CONCAT(DISTINCT ProductName)",
+                "GROUP BY CustomerID ORDER BY TOTAL(Amount) DESC, MIN(id)"):
+            customer_stats[c_id] = {
+                # Product names never contain commas (the parser replaces them)
+                'total_spent': spent, 'purchase_count': count,
+                'products_bought': products.split(',') if products else [],
+                'avg_order_value': round(spent / count, 2) if count > 0 else 0.0
+            }
+        return customer_stats
+
+    def daily_sales_trend(self):
+        return {
+            date: {'revenue': revenue, 'transaction_count': count, 'unique_customers': customers}
+            for date, revenue, count, customers in self._query(
+                "Date, TOTAL(Amount), COUNT(*), COUNT(DISTINCT CustomerID)", "GROUP BY Date ORDER BY Date")
+        }
+
+    def find_peak_sales_day(self):
+        row = self._query("Date, TOTAL(Amount) AS revenue, COUNT(*)",
+                          "GROUP BY Date ORDER BY revenue DESC, Date LIMIT 1").fetchone()
+        return tuple(row) if row else None
+
+    def low_performing_products(self, threshold=10):
+        rows = self._query("ProductName, SUM(Quantity) AS qty, TOTAL(Amount)",
+                           "GROUP BY ProductName HAVING qty < ? ORDER BY qty, MIN(id)", (threshold,))
+        return [tuple(row) for row in rows]
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+#       VECTORIZED (PANDAS) ANALYTICS
+# ==========================================
+# Same outputs as the pure-Python functions in data_processor, computed with
+# factorize + bincount over columns. np.bincount adds weights in row order,
+# so every float total is summed in exactly the same order as the Python loops.
+
+COLUMNS = ['TransactionID', 'Date', 'ProductID', 'ProductName',
+           'Quantity', 'UnitPrice', 'CustomerID', 'Region']
+
+def to_frame(transactions):
+    """
+    Returns a DataFrame with a TotalSale column.
+    Accepts a DataFrame (returned as-is if it already has TotalSale) or any iterable of rows.
+    """
+    if isinstance(transactions, pd.DataFrame):
+        df = transactions
+    else:
+        rows = list(transactions)
+        df = pd.DataFrame(rows) if rows else pd.DataFrame(columns=COLUMNS)
+    if 'TotalSale' not in df.columns:
+        df = df.assign(TotalSale=df['Quantity'] * df['UnitPrice'])
+    return df
+
+def _factorize(column, sort=False):
+    codes, uniques = pd.factorize(column, sort=sort, use_na_sentinel=False)
+    return codes, np.asarray(uniques, dtype=object)
+
+def _group_sums(codes, values, size):
+    return np.bincount(codes, weights=np.asarray(values, dtype=np.float64), minlength=size)
+
+def _stable_order(values, descending=False):
+    # Matches sorted(..., reverse=descending): ties keep first-seen order
+    return np.argsort(-values if descending else values, kind='stable')
+
+def _product_totals(df):
+    codes, names = _factorize(df['ProductName'])
+    qty = _group_sums(codes, df['Quantity'], len(names)).astype(np.int64)
+    revenue = _group_sums(codes, df['TotalSale'], len(names))
+    return names, qty, revenue
+
+def calculate_total_revenue(df):
+    df = to_frame(df)
+    if df.empty: return 0
+    # cumsum adds sequentially, unlike the pairwise summation of .sum()
+    return float(np.cumsum(df['TotalSale'].to_numpy(dtype=np.float64))[-1])
+
+def region_wise_sales(df):
+    df = to_frame(df)
+    codes, regions = _factorize(df['Region'])
+    sales = _group_sums(codes, df['TotalSale'], len(regions))
+    counts = np.bincount(codes, minlength=len(regions))
+    total_revenue = calculate_total_revenue(df)
+
+    stats = {}
+    for i in _stable_order(sales, descending=True):
+        s = float(sales[i])
+        stats[regions[i]] = {
+            'total_sales': s, 'transaction_count': int(counts[i]),
+            'percentage': round((s / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
+        }
+    return stats
+
+def top_selling_products(df, n=5):
+    names, qty, revenue = _product_totals(to_frame(df))
+    return [(names[i], int(qty[i]), float(revenue[i])) for i in _stable_order(qty, descending=True)[:n]]
+
+def customer_analysis(df):
+    df = to_frame(df)
+    c_codes, customers = _factorize(df['CustomerID'])
+    p_codes, products = _factorize(df['ProductName'])
+    spent = _group_sums(c_codes, df['TotalSale'], len(customers))
+    counts = np.bincount(c_codes, minlength=len(customers))
+
+    # Distinct (customer, product) pairs, grouped per customer
+    pairs = pd.DataFrame({'c': c_codes, 'p': p_codes}).drop_duplicates()
+    pair_c = pairs['c'].to_numpy()
+    pair_p = pairs['p'].to_numpy()[np.argsort(pair_c, kind='stable')]
+    bought = np.split(pair_p, np.cumsum(np.bincount(pair_c, minlength=len(customers)))[:-1])
+
+    customer_stats = {}
+    for i in _stable_order(spent, descending=True):
+        s, c = float(spent[i]), int(counts[i])
+        customer_stats[customers[i]] = {
+            'total_spent': s, 'purchase_count': c, 'products_bought': products[bought[i]].tolist(),
+            'avg_order_value': round(s / c, 2) if c > 0 else 0.0
+        }
+    return customer_stats
+
+def daily_sales_trend(df):
+    df = to_frame(df)
+    d_codes, dates = _factorize(df['Date'], sort=True)
+    c_codes, _ = _factorize(df['CustomerID'])
+    revenue = _group_sums(d_codes, df['TotalSale'], len(dates))
+    counts = np.bincount(d_codes, minlength=len(dates))
+    pairs = pd.DataFrame({'d': d_codes, 'c': c_codes}).drop_duplicates()
+    unique_customers = np.bincount(pairs['d'].to_numpy(), minlength=len(dates))
+
+    return {
+        dates[i]: {
+            'revenue': float(revenue[i]), 'transaction_count': int(counts[i]),
+            'unique_customers': int(unique_customers[i])
+        }
+        for i in range(len(dates))
+    }
+
+def find_peak_sales_day(df):
+    daily_stats = daily_sales_trend(df)
+    if not daily_stats: return None
+    peak_date = max(daily_stats, key=lambda d: daily_stats[d]['revenue'])
+    return (peak_date, daily_stats[peak_date]['revenue'], daily_stats[peak_date]['transaction_count'])
+
+def low_performing_products(df, threshold=10):
+    names, qty, revenue = _product_totals(to_frame(df))
+    low = np.flatnonzero(qty < threshold)
+    return [(names[i], int(qty[i]), float(revenue[i])) for i in low[_stable_order(qty[low])]]
+
+class FrameStats:
+    """
+    Report-facing view over a DataFrame, exposing the same attributes and
+    methods as SalesAccumulator so generate_sales_report can use either backend.
+    """
+
+    def __init__(self, transactions):
+        self.df = df = to_frame(transactions)
+        self.transaction_count = len(df)
+        self.total_revenue = calculate_total_revenue(df)
+        self.min_date = df['Date'].min() if len(df) else None
+        self.max_date = df['Date'].max() if len(df) else None
+
+        if 'API_Match' in df.columns:
+            match = df['API_Match']
+            self.enriched_count = len(df)
+            self.matched_count = int((match == True).sum())
+            self.missing_products = dict.fromkeys(df.loc[match == False, 'ProductName'].unique())
+        else:
+            self.enriched_count = 0
+            self.matched_count = 0
+            self.missing_products = {}
+
+    def add_enrichment_summary(self, summary):
+        """
+        Same as SalesAccumulator.add_enrichment_summary.
+        """
+        self.enriched_count += summary['enriched']
+        self.matched_count += summary['matched']
+        self.missing_products.update(dict.fromkeys(summary['missing_products']))
+        return self
+
+    def region_wise_sales(self):
+        return region_wise_sales(self.df)
+
+    def top_selling_products(self, n=5):
+        return top_selling_products(self.df, n)
+
+    def customer_analysis(self):
+        return customer_analysis(self.df)
+
+    def daily_sales_trend(self):
+        return daily_sales_trend(self.df)
+
+    def find_peak_sales_day(self):
+        return find_peak_sales_day(self.df)
+
+    def low_performing_products(self, threshold=10):
+        return low_performing_products(self.df, threshold)